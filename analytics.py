@@ -0,0 +1,119 @@
+"""Squad feasibility for every team in one NumPy pass.
+
+A team's purse is not all biddable: every squad slot it still has to fill
+costs at least the cheapest base price left in the pool, and role minimums
+(AUCTION_ROLE_MINIMUMS, e.g. "Wicket Keeper=1,Bowler=4") say which roles
+those slots must go to. For each team this module works out
+
+- shortfall: players still needed per role to meet the minimums
+- reserve: the least it will cost to fill the rest of the squad
+- max_bid: the most it can bid for a player of each role and still
+  complete its squad (0 once the squad is full, or when the player would
+  take a slot the minimums need for another role)
+
+Slots to fill are the open places up to max_players, or just the role
+shortfall when a team has no squad limit. Slot prices are the cheapest
+unsold base price per role, and never less than MIN_SLOT_PRICE. These are
+the rules db.squad_limits() applies to one team when check_bid() enforces
+them on every bid; this module computes them for display.
+
+feasibility() is memoised on the standings and slot prices, which only
+move when a player is sold, unsold or added. Bids leave both alone, so a
+rerun during bidding reuses the previous NumPy pass (it only rescans the
+pool for prices when the snapshot changed), and after a sale the whole
+league is recomputed at once in well under a millisecond.
+"""
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+import db
+
+MIN_SLOT_PRICE = db.MIN_SLOT_PRICE
+ROLE_MINIMUMS = db.ROLE_MINIMUMS
+
+# Arrays are indexed [team] or [team, column]; the columns are db.ROLES
+# followed by one for players whose role has no minimum
+Feasibility = namedtuple('Feasibility', ['teams', 'index', 'remaining', 'reserve', 'shortfall', 'max_bid'])
+
+
+def slot_prices(players):
+    # db.slot_prices() for the unsold players in a snapshot
+    cheapest = {}
+    for p in players:
+        if p['status'] == 'Unsold':
+            price = p['base_price'] or 0
+            if p['role'] not in cheapest or price < cheapest[p['role']]:
+                cheapest[p['role']] = price
+    return db.slot_prices(cheapest)
+
+
+@functools.lru_cache(maxsize=32)
+def _compute(rows, prices, minimums):
+    teams = tuple(row[0] for row in rows)
+    values = np.array([row[1:] for row in rows], dtype=np.int64).reshape(len(rows), 3 + len(db.ROLES))
+    remaining, players, cap, counts = values[:, 0], values[:, 1], values[:, 2], values[:, 3:]
+    prices = np.array(prices, dtype=np.int64)
+    role_prices, any_price = prices[:-1], prices[-1]
+
+    shortfall = np.clip(np.array(minimums, dtype=np.int64) - counts, 0, None)
+    short_total = shortfall.sum(axis=1)
+    capped = cap > 0
+    full = capped & (players >= cap)
+    required = np.where(capped, np.maximum(cap - players, short_total), short_total)
+    spare = required - short_total  # slots any role can fill
+    reserve = shortfall @ role_prices + spare * any_price
+
+    # Buying a player frees the reserve held for the slot they fill: their
+    # role's slot if the team is short of it, otherwise a spare one
+    needed = np.zeros((len(rows), len(prices)), dtype=bool)
+    needed[:, :-1] = shortfall > 0
+    freed = np.where(needed, prices, np.where(spare > 0, any_price, 0)[:, None])
+    allowed = ~full[:, None] & (needed | (spare > 0)[:, None] | ~capped[:, None])
+    max_bid = np.where(allowed, np.clip(remaining[:, None] - (reserve[:, None] - freed), 0, None), 0)
+
+    for array in (remaining, reserve, shortfall, max_bid):
+        array.flags.writeable = False
+    return Feasibility(teams, {name: i for i, name in enumerate(teams)}, remaining, reserve, shortfall, max_bid)
+
+
+_last_prices = (None, None)  # (players tuple, its slot prices), shared by every session
+
+
+def feasibility(snapshot):
+    global _last_prices
+    players, prices = _last_prices
+    if players is not snapshot.players:
+        prices = slot_prices(snapshot.players)
+        _last_prices = (snapshot.players, prices)
+    rows = tuple(
+        (t['name'], t['remaining'], t['players'], t['max_players'] or 0, *(t[role] for role in db.ROLES))
+        for t in snapshot.standings
+    )
+    return _compute(rows, prices, ROLE_MINIMUMS)
+
+
+def _column(role):
+    return db.ROLES.index(role) if role in db.ROLES else len(db.ROLES)
+
+
+def max_bid(feas, team, role=None):
+    # The most team can bid for a player of role; with no role, for the
+    # player it can best afford
+    i = feas.index.get(team)
+    if i is None:
+        return 0
+    return int(feas.max_bid[i].max() if role is None else feas.max_bid[i, _column(role)])
+
+
+def team_limits(feas, team, role=None):
+    i = feas.index.get(team)
+    if i is None:
+        return None
+    return {
+        'remaining': int(feas.remaining[i]),
+        'reserve': int(feas.reserve[i]),
+        'max_bid': max_bid(feas, team, role),
+        'shortfall': {role: int(n) for role, n in zip(db.ROLES, feas.shortfall[i]) if n},
+    }
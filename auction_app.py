@@ -1,11 +1,26 @@
 import streamlit as st
-import pandas as pd
+import sqlite3
 import time
+import uuid
+import analytics
 import db
+import diagnostics
+import memory_backend
+import render
+import scheduler
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Cricket Auction Dashboard", layout="wide")
 
+# --- Storage Backend (SQLite unless AUCTION_BACKEND=memory) ---
+if memory_backend.ENABLED:
+    memory_backend.install()
+
+# --- Diagnostics (off unless AUCTION_DIAGNOSTICS=1) ---
+if diagnostics.ENABLED:
+    diagnostics.instrument(db)
+    diagnostics.begin_run(st.session_state.setdefault('diagnostics_session', uuid.uuid4().hex))
+
 # --- Database Initialization ---
 if 'db_initialized' not in st.session_state:
     db.init_db()
@@ -14,8 +29,14 @@ if 'db_initialized' not in st.session_state:
     db.create_user(db_user, db_password) 
     st.session_state['db_initialized'] = True
 
-# --- Sidebar: Role Selection ---
+# Closes timed lots server-side; one thread per process however many sessions
+scheduler.start()
+
+# --- Sidebar: Auction and Role Selection ---
 st.sidebar.title("Auction Settings")
+auction_id = st.sidebar.selectbox("Auction", db.list_auctions(), key="auction_id")
+# Every db call below this line works on the selected auction's database
+db.use_auction(auction_id)
 role = st.sidebar.radio("Select Role", ["Viewer", "Admin"])
 
 # --- Admin Authentication ---
@@ -35,93 +56,209 @@ if role == "Admin":
         st.warning("Please login to access Admin features.")
         st.stop() # Stop execution here if not authenticated
 
+    def create_auction():
+        new_id = st.session_state['new_auction_id'].strip()
+        try:
+            db.use_auction(new_id)
+        except ValueError as e:
+            st.session_state['auction_error'] = str(e)
+            return
+        st.session_state['auction_id'] = new_id
+        st.session_state['new_auction_id'] = ""
+
+    with st.sidebar.expander("New Auction"):
+        st.text_input("Auction ID", key="new_auction_id", help="Letters, digits, '-' and '_'")
+        st.button("Create Auction", on_click=create_auction)
+        if 'auction_error' in st.session_state:
+            st.error(st.session_state.pop('auction_error'))
+
 # --- Helper Functions ---
-def auto_refresh():
-    time.sleep(2)
-    st.rerun()
+REFRESH_LIVE = 0.5  # seconds between refreshes while bids are coming in
+REFRESH_OPEN = 2  # slowest refresh while a lot is still open for bids
+REFRESH_IDLE = 1  # first idle interval; doubles every IDLE_STEP quiet seconds
+REFRESH_MAX = 8
+IDLE_STEP = 10
+LIVE_WINDOW = 10  # a lot counts as live this long after its last change
+
+def auction_complete(snapshot):
+    return snapshot.current_player is None and snapshot.players and not any(
+        p['status'] == 'Unsold' for p in snapshot.players
+    )
+
+def refresh_interval(snapshot):
+    # Fast while bids are coming in or a lot clock is running, never slower
+    # than REFRESH_OPEN while a lot is open, slower the longer nothing
+    # changes between lots, and slowest once the auction is complete (an
+    # unsell or a roll back can still reopen it)
+    if auction_complete(snapshot):
+        return REFRESH_MAX
+    seen = st.session_state.get('refresh_seen')
+    if seen is None or seen[0] != snapshot.version:
+        seen = st.session_state['refresh_seen'] = (snapshot.version, time.time())
+    idle = time.time() - seen[1]
+    lot = snapshot.current_player
+    if lot is not None and lot['status'] == 'Unsold':
+        if snapshot.lot_deadline or idle < LIVE_WINDOW:
+            return REFRESH_LIVE
+        return REFRESH_OPEN
+    return min(REFRESH_MAX, REFRESH_IDLE * 2 ** int(idle // IDLE_STEP))
+
+def live_fragment(draw):
+    # Only draw(snapshot) reruns on the refresh timer; the rest of the page
+    # (other tabs, sidebar) reruns on input or when the pace has to change
+    every = refresh_interval(db.get_snapshot())
+    in_full_run = True
+
+    @st.fragment(run_every=every)
+    def live():
+        # Fragment reruns and their button clicks run on a fresh thread, where
+        # the auction picked in the sidebar is not set yet
+        db.use_auction(st.session_state['auction_id'])
+        if not in_full_run and diagnostics.ENABLED:
+            diagnostics.begin_run(st.session_state['diagnostics_session'])
+        snapshot = db.get_snapshot()
+        draw(snapshot)
+        if not in_full_run:
+            diagnostics.mark_rendered()
+            if refresh_interval(snapshot) != every:
+                # run_every is fixed when the fragment is drawn, so redraw the page
+                st.rerun()
+
+    live()
+    in_full_run = False
+
+def submit_bid(player, team, increment):
+    # The bid only lands if the lot still shows the bid this page rendered
+    result = db.place_bid(player['id'], team, increment, player['current_bid'] or 0, player['holding_team'])
+    if result.accepted:
+        st.rerun()
+    st.error(f"Bid rejected: {result.reason}")
+
+def limits_caption(limits):
+    caption = f"Purse: {limits['remaining']} · Reserve: {limits['reserve']} · Max bid: {limits['max_bid']}"
+    if limits['shortfall']:
+        caption += " · Still needs " + ", ".join(f"{n} {role}" for role, n in limits['shortfall'].items())
+    return caption
+
+def lot_clock(deadline):
+    # Every screen counts down to the same deadline stored with the auction
+    remaining = max(0, int(deadline - time.time() + 0.999))
+    return f"⏱️ Closes in {remaining}s" if remaining else "⏱️ Closing..."
+
+def import_format(uploaded_file):
+    return 'csv' if uploaded_file.name.lower().endswith('.csv') else 'json'
+
+def show_import_report(report):
+    st.success(f"Imported {report.inserted} rows.")
+    if report.rejected:
+        st.warning(f"Skipped {len(report.rejected)} rows.")
+        st.table(render.display_frame([{"Row": n, "Reason": reason} for n, reason in report.rejected]))
+
+EXPORT_LABELS = {'csv': "CSV", 'parquet': "Parquet", 'jsonl': "JSON Lines"}
+EXPORT_MIME = {'csv': "text/csv", 'parquet': "application/vnd.apache.parquet", 'jsonl': "application/x-ndjson"}
+
+POOL_COLUMNS = ['name', 'role', 'category', 'base_price', 'status', 'sold_to', 'price']
+POOL_PAGE_SIZE = 25
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_player_page(auction, version, **query):
+    # Keyed on the auction and its state version, so screens asking for the same page share one query
+    return db.query_players(**query)
+
+def player_pool(key, teams, version=None):
+    # Filters and paging run in SQL; only the visible page is fetched
+    f_search, f_role, f_status, f_team, f_sort, f_page = st.columns([3, 2, 2, 2, 2, 1])
+    search = f_search.text_input("Search", key=f"{key}_search")
+    role = f_role.selectbox("Role", ["All", *db.ROLES], key=f"{key}_role")
+    status = f_status.selectbox("Status", ["All", "Unsold", "Sold"], key=f"{key}_status")
+    team = f_team.selectbox("Team", ["All", *[t['name'] for t in teams]], key=f"{key}_team")
+    sort = f_sort.selectbox("Sort By", ['id', 'name', 'role', 'base_price', 'price'], key=f"{key}_sort")
+    page_no = f_page.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page")
+
+    query = dict(
+        page=page_no - 1,
+        page_size=POOL_PAGE_SIZE,
+        sort=sort,
+        descending=sort in ('base_price', 'price'),
+        role=None if role == "All" else role,
+        status=None if status == "All" else status,
+        team=None if team == "All" else team,
+        search=search or None,
+        columns=POOL_COLUMNS,
+    )
+    page = cached_player_page(db.current_auction(), version, **query) if version is not None else db.query_players(**query)
+
+    if page.rows:
+        st.dataframe(render.frame(page.rows, POOL_COLUMNS), use_container_width=True)
+        first = (page_no - 1) * POOL_PAGE_SIZE + 1
+        st.caption(f"Showing {first}-{first + len(page.rows) - 1} of {page.total} players")
+    else:
+        st.caption(f"No players on this page ({page.total} match).")
 
 # --- VIEWER MODE ---
 if role == "Viewer":
     st.title("👀 Live Auction View")
     
-    # 1. Current Player on Auction
-    current_player = db.get_current_player()
-    
-    if current_player:
-        current_bid = current_player['current_bid'] if current_player['current_bid'] else 0
-        holding_team = current_player['holding_team']
-        
-        if current_player['status'] == 'Sold':
-            st.markdown(f"""
-            <div style="background-color: #fff3e0; padding: 40px; border-radius: 15px; text-align: center; border: 3px solid #ff9800; margin-bottom: 20px;">
-                <h1 style="color: #e65100; font-size: 4em;">🎉 SOLD!</h1>
-                <h2 style="color: #333;">{current_player['name']}</h2>
-                <hr>
-                <h3 style="color: #555;">Sold to <span style="color: #d84315; font-weight: bold;">{current_player['sold_to']}</span></h3>
-                <h1 style="color: #2e7d32; font-size: 3.5em;">₹ {int(current_player['price'])}</h1>
-            </div>
-            """, unsafe_allow_html=True)
-            st.balloons()
+    def viewer_page(snapshot):
+        # All viewer sessions share one in-memory snapshot of the auction state,
+        # so the database load does not grow with the number of screens.
+        current_player, players, teams = snapshot.current_player, snapshot.players, snapshot.teams
+
+        # 1. Current Player on Auction
+        # Fragments come from render's caches, so an unchanged lot or table
+        # costs a dictionary lookup rather than a rebuild.
+        if current_player:
+            st.markdown(render.lot_card(current_player), unsafe_allow_html=True)
+            if current_player['status'] == 'Sold':
+                # Celebrate each sale once per screen, not on every refresh
+                sale = (current_player['id'], current_player['sold_to'], current_player['price'])
+                if st.session_state.get('celebrated_sale') != sale:
+                    st.session_state['celebrated_sale'] = sale
+                    st.balloons()
+            elif snapshot.lot_deadline:
+                st.markdown(f'<h2 style="color: #e65100; text-align: center;">{lot_clock(snapshot.lot_deadline)}</h2>', unsafe_allow_html=True)
+        elif auction_complete(snapshot):
+            st.success("Auction Complete!")
         else:
-            st.markdown(f"""
-            <div style="background-color: #e8f5e9; padding: 40px; border-radius: 15px; text-align: center; border: 3px solid #4CAF50; margin-bottom: 20px;">
-                <h1 style="color: #2e7d32; font-size: 3em;">{current_player['name']}</h1>
-                <h3 style="color: #555;">{current_player['role']}</h3>
-                <hr>
-                <h2 style="color: #d32f2f; font-size: 2.5em;">Current Bid: ₹ {current_bid}</h2>
-                <h3 style="color: #1976d2;">Holding: {holding_team if holding_team else 'Waiting for bids...'}</h3>
+            st.info("Waiting for the next player to be brought to the auction floor...")
+            st.markdown("""
+            <div style="text-align: center; padding: 50px;">
+                <h2>⏳ Auction in Progress...</h2>
             </div>
             """, unsafe_allow_html=True)
-    else:
-        st.info("Waiting for the next player to be brought to the auction floor...")
-        st.markdown("""
-        <div style="text-align: center; padding: 50px;">
-            <h2>⏳ Auction in Progress...</h2>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # 2. Recent Sales (Last 5)
-    st.subheader("Recent Sales")
-    players = db.get_players()
-    sold_players = [p for p in players if p['status'] == 'Sold']
-    if sold_players:
-        df = pd.DataFrame(sold_players)
-        df['price'] = df['price'].fillna(0).astype(int)
-        st.table(df[['name', 'role', 'sold_to', 'price']].tail(5))
-    else:
-        st.write("No players sold yet.")
-
-    # 3. Team Standings
-    st.subheader("Team Standings")
-    teams = db.get_teams()
-    if teams:
-        df_teams = pd.DataFrame(teams)
-        df_teams['Remaining Purse'] = df_teams['budget'] - df_teams['spent']
-        st.table(df_teams[['name', 'budget', 'spent', 'Remaining Purse']])
-        
-    # 4. Player Pool Status
-    st.subheader("Player Pool Status")
-    if players:
-        # Show all players with relevant columns
-        pool_df = pd.DataFrame(players)
-        
-        # Ensure price is integer (fill NaN with 0 first if needed, though Unsold has None)
-        # For display, we can just format or fillna
-        pool_df['price'] = pool_df['price'].fillna(0).astype(int)
+
+        # 2. Recent Sales (Last 5)
+        st.subheader("Recent Sales")
+        if snapshot.recent_sales:
+            st.markdown(render.recent_sales_table(snapshot.recent_sales), unsafe_allow_html=True)
+        else:
+            st.write("No players sold yet.")
+
+        # 3. Team Standings
+        st.subheader("Team Standings")
+        if snapshot.standings:
+            feas = analytics.feasibility(snapshot)
+            max_bids = [analytics.max_bid(feas, t['name']) for t in snapshot.standings]
+            st.markdown(render.standings_table(snapshot.standings, max_bids), unsafe_allow_html=True)
         
-        # Select user-friendly columns
-        st.dataframe(pool_df[['name', 'role', 'status', 'sold_to', 'price']], use_container_width=True)
-    else:
-        st.info("No players in pool.")
-    
-    # Auto-refresh for live updates
-    auto_refresh()
+        # 4. Player Pool Status
+        st.subheader("Player Pool Status")
+        if players:
+            player_pool("viewer", teams, snapshot.version)
+        else:
+            st.info("No players in pool.")
+
+    live_fragment(viewer_page)
+    diagnostics.mark_rendered()
 
 # --- ADMIN MODE ---
 else:
     st.title("🏏 Auction Admin Console")
     
-    tab1, tab2, tab3 = st.tabs(["1. Setup", "2. Auction Room", "3. Team Views"])
+    tab_names = ["1. Setup", "2. Auction Room", "3. Team Views"]
+    if diagnostics.ENABLED:
+        tab_names.append("Diagnostics")
+    tab1, tab2, tab3, *tab_diag = st.tabs(tab_names)
     
     # --- TAB 1: SETUP ---
     with tab1:
@@ -133,55 +270,105 @@ else:
             st.subheader("Add Teams")
             new_team = st.text_input("Team Name")
             team_budget = st.number_input("Team Budget", min_value=1000, value=10000, step=500)
+            max_players = st.number_input("Max Squad Size (0 = no limit)", min_value=0, value=0, step=1)
             if st.button("Add Team"):
-                if db.add_team(new_team, team_budget):
+                if db.add_team(new_team, team_budget, max_players or None):
                     st.success(f"Added {new_team}")
                 else:
                     st.error("Team already exists.")
             
+            team_file = st.file_uploader("Bulk Import Teams (CSV/JSON)", type=["csv", "json", "jsonl"], key="team_file")
+            if team_file and st.button("Import Teams"):
+                try:
+                    report = db.import_teams(team_file, import_format(team_file))
+                except (ValueError, sqlite3.Error) as e:
+                    st.error(f"Could not import teams: {e}")
+                else:
+                    show_import_report(report)
+            
             teams = db.get_teams()
             if teams:
                 st.write("### Registered Teams")
-                st.table(pd.DataFrame(teams))
+                st.table(render.display_frame(teams))
 
         with col2:
             st.subheader("Add Player Pool")
             p_name = st.text_input("Player Name")
-            p_role = st.selectbox("Role", ["Batsman", "Bowler", "All-Rounder", "Wicket Keeper"])
+            p_role = st.selectbox("Role", db.ROLES)
+            p_base_price = st.number_input("Base Price", min_value=0, value=0, step=100)
+            p_category = st.text_input("Category (optional)")
             if st.button("Add Player"):
-                db.add_player(p_name, p_role)
+                db.add_player(p_name, p_role, p_base_price or None, p_category or None)
                 st.success(f"Added {p_name}")
             
+            player_file = st.file_uploader("Bulk Import Players (CSV/JSON)", type=["csv", "json", "jsonl"], key="player_file")
+            st.caption("Columns: name, role, base_price (optional), category (optional)")
+            if player_file and st.button("Import Players"):
+                try:
+                    report = db.import_players(player_file, import_format(player_file))
+                except (ValueError, sqlite3.Error) as e:
+                    st.error(f"Could not import players: {e}")
+                else:
+                    show_import_report(report)
+            
             st.write("---")
             
             # Manage Pool
             st.subheader("Manage Pool")
-            players = db.get_players()
-            unsold_players = [p for p in players if p['status'] == 'Unsold']
+            unsold_players = db.get_players(columns=['id', 'name'], status='Unsold')
             
             if unsold_players:
-                p_options = [p['name'] for p in unsold_players]
-                p_to_remove = st.selectbox("Select Player to Remove", p_options)
+                p_to_remove = st.selectbox("Select Player to Remove", unsold_players, format_func=lambda p: p['name'])
                 if st.button("Remove Player"):
-                    db.remove_player(p_to_remove)
-                    st.success(f"Removed {p_to_remove}")
+                    db.remove_player(p_to_remove['id'])
+                    st.success(f"Removed {p_to_remove['name']}")
                     st.rerun()
             
-            st.info(f"Total Players: {len(players)}")
-            if players:
-                st.dataframe(pd.DataFrame(players))
+            player_pool("setup", teams)
+
+        st.write("---")
+        st.subheader("Lot Queue")
+        st.caption("Shuffles the unsold pool set by set (player category). The same seed always gives the same order.")
+        q_col1, q_col2 = st.columns(2)
+        with q_col1:
+            queue_seed = st.number_input("Seed (0 = random)", min_value=0, value=0, step=1)
+            categories = sorted({p['category'] for p in db.get_players(columns=['category'], status='Unsold') if p['category']})
+            set_order = st.multiselect("Call these sets first", categories)
+            if st.button("Shuffle Lot Queue"):
+                seed = db.build_lot_queue(queue_seed or None, set_order)
+                st.success(f"Queue shuffled with seed {seed}.")
+        with q_col2:
+            queue = db.get_lot_queue_summary()
+            st.info(f"{queue['remaining']} lots queued" + (f" (seed {queue['seed']})" if queue['seed'] else ""))
+            if queue['sets']:
+                st.table(render.display_frame([
+                    {"Set": s['set_name'], "Round": s['round'], "Lots": s['lots']} for s in queue['sets']
+                ]))
+
+        st.write("---")
+        st.subheader("Lot Timer")
+        st.caption("Closes each lot automatically: sold to the highest bidder, or passed if nobody bids.")
+        timer = db.get_lot_timer()
+        t_col1, t_col2 = st.columns(2)
+        with t_col1:
+            lot_seconds = st.number_input("Seconds per lot (0 = off)", min_value=0, value=timer['lot_seconds'] or 0, step=5)
+        with t_col2:
+            bid_extension = st.number_input("Each bid keeps the lot open for at least (s)", min_value=0, value=timer['bid_extension'] or 0, step=1)
+        if st.button("Save Timer"):
+            db.set_lot_timer(lot_seconds, bid_extension)
+            st.success("Timer applies from the next lot." if lot_seconds else "Lot timer off.")
 
         if st.button("⚠️ Reset Entire Auction"):
             db.reset_auction()
             st.warning("Auction Reset!")
             st.rerun()
 
+
     # --- TAB 2: AUCTION ROOM ---
-    with tab2:
-        st.header("🔨 The Auction Floor")
-        
-        teams = db.get_teams()
-        players = db.get_players()
+    # Only the floor refreshes itself; Setup and Team Views wait for input
+    def auction_floor(snapshot):
+        teams = snapshot.teams
+        players = snapshot.players
         
         if not teams:
             st.warning("Add teams first.")
@@ -189,7 +376,7 @@ else:
             st.warning("Add players first.")
         else:
             # Check for current player
-            current_player = db.get_current_player()
+            current_player = snapshot.current_player
             
             # --- SCREEN 1: SELECTION ---
             if not current_player:
@@ -215,11 +402,16 @@ else:
                         col_rand, col_spacer, col_manual = st.columns([2, 0.5, 2])
                         
                         with col_rand:
-                            st.write("### 🎲 Random")
-                            if st.button("Pick Random Player", type="primary", use_container_width=True):
-                                import random
-                                p_obj = random.choice(unsold_players)
-                                db.set_current_player(p_obj['name'])
+                            st.write("### 🎲 Next Lot")
+                            queue = db.get_lot_queue_summary()
+                            if queue['remaining']:
+                                st.caption(f"{queue['remaining']} lots queued (seed {queue['seed']})")
+                            else:
+                                st.caption("Queue is empty; the unsold pool will be shuffled.")
+                            if st.button("Bring Up Next Lot", type="primary", use_container_width=True):
+                                if db.next_lot() is None:
+                                    db.build_lot_queue()
+                                    db.next_lot()
                                 st.rerun()
                         
                         with col_manual:
@@ -230,7 +422,7 @@ else:
                             if st.button("Bring Selected to Auction", type="primary", use_container_width=True):
                                 idx = p_options.index(selected_option)
                                 p_obj = unsold_players[idx]
-                                db.set_current_player(p_obj['name'])
+                                db.set_current_player(p_obj['id'])
                                 st.rerun()
                     
                     st.divider()
@@ -246,6 +438,8 @@ else:
                         <h4 style="color: #666;">{current_player['role']}</h4>
                     </div>
                     """, unsafe_allow_html=True)
+                    if snapshot.lot_deadline:
+                        st.warning(lot_clock(snapshot.lot_deadline))
                 
                 # --- Head-to-Head Bidding ---
                 st.subheader("⚔️ Bidding War")
@@ -282,43 +476,37 @@ else:
                 
                 # Only show bidding controls if NOT sold
                 if current_player['status'] == 'Unsold':
+                    # Raises that would leave a team unable to complete its squad are disabled
+                    feas = analytics.feasibility(snapshot)
                     bid_col1, bid_col2 = st.columns(2)
                     
                     # Team A Controls
                     with bid_col1:
                         st.markdown(f"### {t1}")
-                        t1_stats, _ = db.get_team_stats(t1)
-                        t1_rem = t1_stats['budget'] - t1_stats['spent']
-                        st.caption(f"Purse: {t1_rem}")
+                        t1_limits = analytics.team_limits(feas, t1, current_player['role'])
+                        st.caption(limits_caption(t1_limits))
                         
                         c1, c2, c3 = st.columns(3)
-                        if c1.button(f"+100", key="t1_100"):
-                            db.update_bid(current_player['name'], t1, current_bid + 100)
-                            st.rerun()
-                        if c2.button(f"+200", key="t1_200"):
-                            db.update_bid(current_player['name'], t1, current_bid + 200)
-                            st.rerun()
-                        if c3.button(f"+500", key="t1_500"):
-                            db.update_bid(current_player['name'], t1, current_bid + 500)
-                            st.rerun()
+                        if c1.button(f"+100", key="t1_100", disabled=current_bid + 100 > t1_limits['max_bid']):
+                            submit_bid(current_player, t1, 100)
+                        if c2.button(f"+200", key="t1_200", disabled=current_bid + 200 > t1_limits['max_bid']):
+                            submit_bid(current_player, t1, 200)
+                        if c3.button(f"+500", key="t1_500", disabled=current_bid + 500 > t1_limits['max_bid']):
+                            submit_bid(current_player, t1, 500)
 
                     # Team B Controls
                     with bid_col2:
                         st.markdown(f"### {t2}")
-                        t2_stats, _ = db.get_team_stats(t2)
-                        t2_rem = t2_stats['budget'] - t2_stats['spent']
-                        st.caption(f"Purse: {t2_rem}")
+                        t2_limits = analytics.team_limits(feas, t2, current_player['role'])
+                        st.caption(limits_caption(t2_limits))
                         
                         c1, c2, c3 = st.columns(3)
-                        if c1.button(f"+100", key="t2_100"):
-                            db.update_bid(current_player['name'], t2, current_bid + 100)
-                            st.rerun()
-                        if c2.button(f"+200", key="t2_200"):
-                            db.update_bid(current_player['name'], t2, current_bid + 200)
-                            st.rerun()
-                        if c3.button(f"+500", key="t2_500"):
-                            db.update_bid(current_player['name'], t2, current_bid + 500)
-                            st.rerun()
+                        if c1.button(f"+100", key="t2_100", disabled=current_bid + 100 > t2_limits['max_bid']):
+                            submit_bid(current_player, t2, 100)
+                        if c2.button(f"+200", key="t2_200", disabled=current_bid + 200 > t2_limits['max_bid']):
+                            submit_bid(current_player, t2, 200)
+                        if c3.button(f"+500", key="t2_500", disabled=current_bid + 500 > t2_limits['max_bid']):
+                            submit_bid(current_player, t2, 500)
 
                 st.divider()
                 
@@ -331,64 +519,150 @@ else:
                 else:
                     if st.button("🔨 SOLD at Current Price", type="primary", use_container_width=True):
                         if holding_team:
-                            if db.sell_player(current_player['name'], holding_team, current_bid):
+                            # Only sells if nobody has raised since this page was drawn
+                            if db.sell_player(current_player['id'], holding_team, current_bid, current_bid, holding_team):
                                 st.success(f"SOLD to {holding_team} for {current_bid}!")
                                 st.rerun()
                             else:
-                                st.error("Sale failed.")
+                                st.error("Sale failed: the bid has moved on or the player is already sold. Refresh and try again.")
                         else:
                             st.error("No bids placed yet.")
                     
                     if st.button("Pass (Unsold)"):
-                        db.set_current_player(None)
+                        db.pass_current_player()
                         st.info("Player passed.")
                         st.rerun()
-            
-            # Auto-refresh removed from here to allow Tab 3 to render
+
+    with tab2:
+        st.header("🔨 The Auction Floor")
+        live_fragment(auction_floor)
 
     # --- TAB 3: TEAM VIEWS ---
     with tab3:
         st.header("📊 Squad Summary")
         
-        teams = db.get_teams()
-        summary_data = []
-        for t in teams:
-            rem = t['budget'] - t['spent']
-            # Get player count
-            _, t_players = db.get_team_stats(t['name'])
-            summary_data.append({
-                "Team Name": t['name'],
-                "Players Bought": len(t_players),
-                "Total Spent": t['spent'],
-                "Remaining Purse": rem
-            })
+        snapshot = db.get_snapshot()
+        squads = snapshot.standings
+        feas = analytics.feasibility(snapshot)
+        summary_data = [{
+            "Team Name": t['name'],
+            "Players Bought": t['players'],
+            "Total Spent": t['spent'],
+            "Remaining Purse": t['remaining'],
+            "Reserve": analytics.team_limits(feas, t['name'])['reserve'],
+            "Max Bid": analytics.max_bid(feas, t['name']),
+            **{r: t[r] for r in db.ROLES},
+        } for t in squads]
         
-        st.dataframe(pd.DataFrame(summary_data), use_container_width=True)
+        st.dataframe(render.display_frame(summary_data), use_container_width=True)
         
         st.write("---")
         
-        selected_team = st.selectbox("View Squad Details:", [t['name'] for t in teams])
+        selected_team = st.selectbox("View Squad Details:", [t['name'] for t in squads])
         if selected_team:
-            _, t_players = db.get_team_stats(selected_team)
+            t_players = db.get_team_squad(selected_team, columns=['name', 'role', 'price'])
             st.subheader(f"{selected_team} Squad")
             if t_players:
-                sq_df = pd.DataFrame(t_players)
-                sq_df['price'] = sq_df['price'].fillna(0).astype(int)
-                st.table(sq_df[['name', 'role', 'price']])
+                st.table(render.display_frame(t_players))
             else:
                 st.info("No players purchased.")
         
         st.write("---")
         st.subheader("⚠️ Corrections")
         
-        players = db.get_players()
-        sold_list = [p['name'] for p in players if p['status'] == 'Sold']
+        sold_list = db.get_players(columns=['id', 'name'], status='Sold')
         if sold_list:
-            p_to_unsell = st.selectbox("Select Player to Unsell", sold_list)
+            p_to_unsell = st.selectbox("Select Player to Unsell", sold_list, format_func=lambda p: p['name'])
             if st.button("Unsell Player"):
-                if db.unsell_player(p_to_unsell):
-                    st.success(f"Unsold {p_to_unsell}.")
+                if db.unsell_player(p_to_unsell['id']):
+                    st.success(f"Unsold {p_to_unsell['name']}.")
+                    st.rerun()
+
+        sales = db.list_sales()
+        if sales:
+            st.write("**Roll Back**")
+            st.caption("Puts the whole auction back to just before a sale: later bids, sales and lots are undone.")
+            bad_sale = st.selectbox(
+                "Roll back to before", sales,
+                format_func=lambda e: f"{e['name']} to {e['team']} for {e['amount']} ({time.strftime('%H:%M:%S', time.localtime(e['ts']))})",
+            )
+            confirm = st.checkbox("I understand everything after this sale is undone")
+            if st.button("Roll Back", disabled=not confirm):
+                try:
+                    result = db.restore(until=bad_sale['seq'] - 1)
+                except ValueError as e:
+                    # The snapshot it needs was pruned, or setup changes are in the way
+                    st.error(f"Cannot roll back to that point: {e}")
+                else:
+                    st.success(f"Rolled back; replayed {result['replayed']} events from the nearest snapshot.")
                     st.rerun()
+
+        if st.button("Check Standings"):
+            drifted = db.check_team_summary(repair=True)
+            if drifted:
+                st.warning(f"Rebuilt standings for: {', '.join(drifted)}")
+            else:
+                st.success("Standings match the sold players.")
+
+        st.write("---")
+        st.subheader("📦 Export")
+        archive = st.checkbox("Every auction (season archive)")
+        export_auctions = db.list_auctions() if archive else [auction_id]
+        
+        summary = db.export_summary(export_auctions)
+        s_col1, s_col2 = st.columns(2)
+        with s_col1:
+            st.write("**Price by Role**")
+            if summary['price_by_role']:
+                st.dataframe(render.display_frame(summary['price_by_role']), use_container_width=True)
+        with s_col2:
+            st.write("**Spend by Team**")
+            if summary['spend_by_team']:
+                st.dataframe(render.display_frame(summary['spend_by_team']), use_container_width=True)
+        
+        e_col1, e_col2 = st.columns(2)
+        export_table = e_col1.selectbox("Data", list(db.EXPORT_TABLES))
+        export_fmt = e_col2.selectbox("Format", db.available_export_formats(), format_func=lambda f: EXPORT_LABELS[f])
+
+        def export_file():
+            # Runs on its own thread when the button is clicked
+            db.use_auction(auction_id)
+            return db.export_bytes(export_table, export_fmt, export_auctions)
+
+        st.download_button(
+            "Download Export", export_file,
+            file_name=f"{'archive' if archive else auction_id}_{export_table}.{export_fmt}",
+            mime=EXPORT_MIME[export_fmt],
+        )
+    
+    # --- DIAGNOSTICS (only when enabled) ---
+    for tab4 in tab_diag:
+        with tab4:
+            st.header("🩺 Diagnostics")
+            session_id = st.session_state['diagnostics_session']
+            stats = diagnostics.session_stats(session_id)
+            
+            if stats and stats['runs']:
+                last_run = stats['runs'][-1]
+                st.subheader("Last Script Run")
+                d1, d2, d3 = st.columns(3)
+                d1.metric("Wall Time (ms)", round((last_run['wall_seconds'] or 0) * 1000, 1))
+                d2.metric("DB Time (ms)", round(last_run['db_seconds'] * 1000, 1))
+                d3.metric("Connections Opened", last_run['connections'])
+                st.dataframe(render.display_frame(
+                    [{"Operation": n, **op} for n, op in sorted(last_run['ops'].items())]
+                ), use_container_width=True)
+            
+            if stats:
+                st.subheader("This Session")
+                st.caption(f"{len(stats['runs'])} recent runs, {stats['connections']} connections opened")
+                st.dataframe(render.display_frame(
+                    [{"Operation": n, **op} for n, op in sorted(stats['ops'].items())]
+                ), use_container_width=True)
+            
+            st.subheader("Process (Prometheus format)")
+            metrics = diagnostics.prometheus_text()
+            st.code(metrics, language="text")
+            st.download_button("Download Metrics", metrics, file_name="auction_metrics.txt")
     
-    # Auto-refresh for Admin to see updates (placed here to ensure all tabs render)
-    auto_refresh()
\ No newline at end of file
+    diagnostics.mark_rendered()
\ No newline at end of file
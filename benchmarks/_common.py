@@ -0,0 +1,28 @@
+"""Helpers shared by the benchmark scripts.
+
+Importing this module puts the repository root on sys.path, so the
+scripts can import db and friends when run as python benchmarks/<name>.py.
+Every script reports percentiles with percentile() so their numbers are
+comparable.
+"""
+import math
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def nearest_rank(sorted_values, pct):
+    # Nearest-rank percentile: the smallest value with at least pct% of the
+    # values at or below it
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(pct * len(sorted_values) / 100) - 1)]
+
+
+def percentile(sorted_values, pct, digits=3, scale=1000):
+    # nearest_rank() of a sorted list of seconds, in milliseconds by default
+    value = nearest_rank(sorted_values, pct)
+    return None if value is None else round(value * scale, digits)
@@ -0,0 +1,123 @@
+"""Direct SQLite vs. the in-memory write-behind backend on the bid path.
+
+Each backend runs in its own process against a fresh temporary database:
+bidding threads raise the current lot through db.place_bid and sell it at
+a target price, while viewer threads poll db.get_snapshot. The report is
+JSON with bids per second and p50/p99 latency per operation per backend,
+and checks that the memory backend's SQLite file caught up after close.
+
+    python benchmarks/backends.py --bidders 4 --viewers 20 --seconds 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from _common import percentile
+import db
+import memory_backend
+
+
+def bidder(team, deadline, latencies, target_price):
+    while time.monotonic() < deadline:
+        lot = db.get_current_player()
+        if lot is None or lot['status'] == 'Sold':
+            unsold = db.get_players(['id'], 'Unsold')
+            if not unsold:
+                return
+            db.set_current_player(unsold[0]['id'])
+            continue
+        if (lot['current_bid'] or 0) >= target_price and lot['holding_team']:
+            db.sell_player(lot['id'], lot['holding_team'], lot['current_bid'])
+            continue
+        if lot['holding_team'] == team:
+            time.sleep(0)
+            continue
+        start = time.perf_counter()
+        db.place_bid(lot['id'], team, 100, lot['current_bid'] or 0, lot['holding_team'])
+        latencies['place_bid'].append(time.perf_counter() - start)
+
+
+def viewer(deadline, latencies):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        db.get_snapshot()
+        latencies['get_snapshot'].append(time.perf_counter() - start)
+        time.sleep(0.001)
+
+
+def run(backend, args, results):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, f'{backend}.db')
+        db.init_db()
+        teams = [f"Team {i}" for i in range(args.bidders)]
+        for team in teams:
+            db.add_team(team, 10 ** 12)
+        rows = ''.join(f"Player {i},{db.ROLES[i % len(db.ROLES)]}\n" for i in range(args.players))
+        db.import_players("name,role\n" + rows)
+        if backend == 'memory':
+            memory_backend.install()
+
+        latencies = defaultdict(list)
+        deadline = time.monotonic() + args.seconds
+        threads = [threading.Thread(target=bidder, args=(t, deadline, latencies, args.target_price)) for t in teams]
+        threads += [threading.Thread(target=viewer, args=(deadline, latencies)) for _ in range(args.viewers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        final = db.get_state_version()
+        if backend == 'memory':
+            memory_backend.close_all()
+        conn = db.get_connection()
+        persisted = conn.execute("SELECT version FROM auction_state WHERE id = 1").fetchone()[0]
+        conn.close()
+        db.close_pool()
+
+    report = {'elapsed_seconds': round(elapsed, 2), 'persisted': persisted == final}
+    for op, values in sorted(latencies.items()):
+        values.sort()
+        report[op] = {
+            'calls': len(values),
+            'per_second': round(len(values) / elapsed, 1),
+            'p50_ms': percentile(values, 50, 4),
+            'p99_ms': percentile(values, 99, 4),
+        }
+    results.put((backend, report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bidders', type=int, default=4)
+    parser.add_argument('--viewers', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--target-price', type=int, default=5000)
+    parser.add_argument('--output', help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    reports, results = {}, multiprocessing.Queue()
+    for backend in ('sqlite', 'memory'):
+        # One process per backend: install() swaps functions for the whole process
+        proc = multiprocessing.Process(target=run, args=(backend, args, results))
+        proc.start()
+        name, report = results.get()
+        proc.join()
+        reports[name] = report
+
+    text = json.dumps({'config': vars(args), 'backends': reports}, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
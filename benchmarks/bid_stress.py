@@ -0,0 +1,114 @@
+"""Stress test for db.place_bid: several bidding consoles, no lost updates.
+
+Each console is a process running one thread per team. Every thread keeps
+reading the lot and raising it with place_bid(expected_bid=...), the way the
+admin page does. At the end the lot's bid must equal the sum of every
+accepted increment, otherwise an update was lost.
+
+    python benchmarks/bid_stress.py --consoles 4 --teams 4 --seconds 5
+
+Exits with status 1 if any update was lost.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import _common  # puts the repo root on sys.path
+import db
+
+INCREMENTS = (100, 200, 500)
+
+
+def bidder(player_id, team, deadline, totals, lock):
+    accepted = rejected = added = 0
+    k = 0
+    while time.monotonic() < deadline:
+        lot = db.get_current_player()
+        if lot['holding_team'] == team:
+            time.sleep(0)
+            continue
+        increment = INCREMENTS[k % len(INCREMENTS)]
+        k += 1
+        result = db.place_bid(player_id, team, increment, lot['current_bid'] or 0, lot['holding_team'])
+        if result.accepted:
+            accepted += 1
+            added += increment
+        else:
+            rejected += 1
+    with lock:
+        totals['accepted'] += accepted
+        totals['rejected'] += rejected
+        totals['added'] += added
+
+
+def console(db_file, player_id, teams, seconds, results):
+    db.DB_FILE = db_file
+    deadline = time.monotonic() + seconds
+    totals = {'accepted': 0, 'rejected': 0, 'added': 0}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=bidder, args=(player_id, t, deadline, totals, lock)) for t in teams]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--consoles', type=int, default=4)
+    parser.add_argument('--teams', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, 'stress.db')
+        db.init_db()
+        teams = [f"Team {i}" for i in range(args.teams)]
+        for team in teams:
+            db.add_team(team, 10 ** 12)
+        db.add_player("Stress Player", "Batsman")
+        player_id = db.get_players(columns=['id'])[0]['id']
+        db.set_current_player(player_id)
+        db.close_pool()
+
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=console, args=(db.DB_FILE, player_id, teams, args.seconds, results))
+            for _ in range(args.consoles)
+        ]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        final_bid = db.get_current_player()['current_bid']
+        db.close_pool()
+
+    accepted = sum(t['accepted'] for t in totals)
+    added = sum(t['added'] for t in totals)
+    report = {
+        'consoles': args.consoles,
+        'teams': args.teams,
+        'seconds': round(elapsed, 2),
+        'accepted_bids': accepted,
+        'rejected_bids': sum(t['rejected'] for t in totals),
+        'accepted_per_second': round(accepted / elapsed, 1),
+        'final_bid': final_bid,
+        'sum_of_accepted_increments': added,
+        'lost_updates': added != final_bid,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report['lost_updates'] else 0)
+
+
+if __name__ == '__main__':
+    main()
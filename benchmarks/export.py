@@ -0,0 +1,114 @@
+"""Time and peak memory of db.write_export() on a multi-season archive.
+
+Seeds --seasons auctions in a temporary directory, each with --players
+players and --bids bid events, then exports players and bid history from
+every season at once in each available format. Peak Python memory is
+measured with tracemalloc, which also slows the exports down. Each export
+also runs on half the seasons, so you can see that the peak stays the same
+while the row count doubles. When pandas is installed, loading the same
+bid history with pd.read_sql is measured for comparison.
+
+    python benchmarks/export.py --seasons 4 --players 5000 --bids 30000
+"""
+import argparse
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import _common  # puts the repo root on sys.path
+import db
+
+
+def seed(season, n_players, n_bids, rng):
+    db.use_auction(season)
+    teams = [f"Team {t}" for t in range(10)]
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO teams (name, budget) VALUES (?, ?)", [(t, 10 ** 9) for t in teams])
+    conn.executemany(
+        "INSERT INTO players (name, role, status, sold_to, price, base_price, category) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (f"Player {i}", rng.choice(db.ROLES), 'Sold' if i % 2 else 'Unsold',
+             rng.choice(teams) if i % 2 else None, rng.randint(1, 200) * 100 if i % 2 else None,
+             rng.choice([None, 1000, 2000]), f"Set {i % 8}")
+            for i in range(n_players)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO events (ts, kind, player_id, team, amount) VALUES (?, 'bid', ?, ?, ?)",
+        [(time.time(), rng.randint(1, n_players), rng.choice(teams), 100 * (i % 500 + 1)) for i in range(n_bids)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'seconds': round(seconds, 3), 'peak_kb': round(peak / 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=4)
+    parser.add_argument('--players', type=int, default=5000)
+    parser.add_argument('--bids', type=int, default=30000)
+    parser.add_argument('--output', help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    report = {'config': vars(args), 'exports': []}
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, 'default.db')
+        db.AUCTIONS_DIR = os.path.join(tmp, 'auctions')
+        seasons = [f"season-{n}" for n in range(1, args.seasons + 1)]
+        rng = random.Random(1)
+        for season in seasons:
+            seed(season, args.players, args.bids, rng)
+
+        # Let each writer load its modules before anything is measured
+        for fmt in db.available_export_formats():
+            db.write_export('teams', io.BytesIO(), fmt, seasons[:1])
+
+        for table in ('players', 'bids'):
+            for fmt in db.available_export_formats():
+                for auctions in (seasons[:max(1, len(seasons) // 2)], seasons):
+                    with open(os.path.join(tmp, f"export.{fmt}"), 'wb') as out:
+                        result, stats = measure(lambda: db.write_export(table, out, fmt, auctions))
+                        size = out.tell()
+                    report['exports'].append({
+                        'table': table, 'format': result.format, 'seasons': len(auctions),
+                        'rows': result.rows, 'bytes': size, **stats,
+                    })
+
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+        if pd is not None:
+            def read_all():
+                frames = []
+                for season in seasons:
+                    conn = db.get_connection(db.auction_file(season))
+                    frames.append(pd.read_sql(db.EXPORT_TABLES['bids'][1], conn))
+                    conn.close()
+                return sum(len(f) for f in frames)
+            rows, stats = measure(read_all)
+            report['pandas_read_sql_bids'] = {'rows': rows, **stats}
+        db.close_pool()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
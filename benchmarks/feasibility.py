@@ -0,0 +1,102 @@
+"""Time analytics.feasibility() for a full league.
+
+Builds a snapshot for --teams teams with --slots squad places each, part
+way through the auction and with role minimums set, then times
+feasibility() right after a sale (standings moved), right after a bid (a
+new snapshot, same standings) and on a rerun where nothing changed. Every
+team's results are also checked against db.squad_limits(), the one-team
+calculation the bid rules enforce.
+
+    python benchmarks/feasibility.py --teams 16 --slots 25
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from _common import percentile
+import analytics
+import db
+
+MINIMUMS = {'Batsman': 6, 'Bowler': 6, 'All-Rounder': 3, 'Wicket Keeper': 2}
+
+
+def league(n_teams, slots, rng):
+    players, standings = [], []
+    for t in range(n_teams):
+        bought = rng.randint(0, slots)
+        counts = dict.fromkeys(db.ROLES, 0)
+        for _ in range(bought):
+            counts[rng.choice(db.ROLES)] += 1
+        budget = 1000000
+        spent = rng.randint(0, budget)
+        standings.append({
+            'name': f"Team {t}", 'budget': budget, 'spent': spent, 'remaining': budget - spent,
+            'players': bought, 'max_players': slots if t % 4 else None, 'max_bid': budget - spent, **counts,
+        })
+    for i in range(n_teams * slots * 2):
+        players.append({
+            'id': i, 'role': rng.choice(db.ROLES), 'status': rng.choice(['Sold', 'Unsold']),
+            'base_price': rng.choice([None, 2000, 5000, 10000, 20000]),
+        })
+    return db.AuctionSnapshot(1, 0, None, tuple(players), (), (), {}, None, tuple(standings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--teams', type=int, default=16)
+    parser.add_argument('--slots', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--output', help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    analytics.ROLE_MINIMUMS = tuple(MINIMUMS[role] for role in db.ROLES)
+    snap = league(args.teams, args.slots, random.Random(1))
+
+    timings = {'after_sale': [], 'after_bid': [], 'unchanged': []}
+    for _ in range(args.repeat):
+        # A sale moves the standings; a bid only hands out a new snapshot
+        analytics._compute.cache_clear()
+        snap = snap._replace(players=tuple(list(snap.players)))
+        start = time.perf_counter()
+        analytics.feasibility(snap)
+        timings['after_sale'].append(time.perf_counter() - start)
+        snap = snap._replace(players=tuple(list(snap.players)))
+        start = time.perf_counter()
+        analytics.feasibility(snap)
+        timings['after_bid'].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        feas = analytics.feasibility(snap)
+        timings['unchanged'].append(time.perf_counter() - start)
+
+    prices = analytics.slot_prices(snap.players)
+    mismatches = []
+    for team in snap.standings:
+        for role in (*db.ROLES, None):
+            expected = db.squad_limits(team, prices, role or 'Coach', analytics.ROLE_MINIMUMS)
+            got = (analytics.team_limits(feas, team['name'])['reserve'], analytics.max_bid(feas, team['name'], role or 'Coach'))
+            if got != expected:
+                mismatches.append({'team': team['name'], 'role': role, 'expected': expected, 'got': got})
+
+    report = {'config': vars(args), 'mismatches': mismatches}
+    for name, values in timings.items():
+        values.sort()
+        report[name] = {
+            'mean_us': round(statistics.mean(values) * 1e6, 1),
+            'p50_us': percentile(values, 50, 1, 1e6),
+            'p99_us': percentile(values, 99, 1, 1e6),
+        }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""Load test: many polling viewers plus concurrent bidders on one database.
+
+Viewers poll get_current_player/get_players/get_teams (or the shared
+snapshot) the way the Streamlit viewer does. Bidders raise the current lot
+with update_bid or place_bid and sell it with sell_player once it reaches
+a target price, then bring up the next lot. Work is spread over threads in
+several processes, all against a temporary database file.
+
+The report is JSON: throughput, p50/p95/p99 latency per operation,
+lock-contention errors, and lost updates (bid increments that were
+reported as applied but are missing from the lot's final bid).
+
+    python benchmarks/load_test.py --processes 4 --viewers 200 --bidders 8 \\
+        --seconds 10 --output bench_output.txt
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from _common import percentile
+import db
+
+INCREMENTS = (100, 200, 500)
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.lock_errors = defaultdict(int)
+        self.failures = defaultdict(int)
+        self.added = defaultdict(int)  # lot id -> increments reported as applied
+        self.sell_conflicts = 0
+
+    def timed(self, name, fn, *args):
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+        except sqlite3.OperationalError as e:
+            with self.lock:
+                self.latencies[name].append(time.perf_counter() - start)
+                if 'locked' in str(e) or 'busy' in str(e):
+                    self.lock_errors[name] += 1
+                else:
+                    self.failures[name] += 1
+            return None
+        with self.lock:
+            self.latencies[name].append(time.perf_counter() - start)
+        return result
+
+    def result(self):
+        return {
+            'latencies': dict(self.latencies),
+            'lock_errors': dict(self.lock_errors),
+            'failures': dict(self.failures),
+            'added': dict(self.added),
+            'sell_conflicts': self.sell_conflicts,
+        }
+
+
+def viewer(rec, deadline, mode, interval):
+    while time.monotonic() < deadline:
+        if mode == 'snapshot':
+            rec.timed('get_snapshot', db.get_snapshot)
+        else:
+            rec.timed('get_current_player', db.get_current_player)
+            rec.timed('get_players', db.get_players)
+            rec.timed('get_teams', db.get_teams)
+        if interval:
+            time.sleep(interval)
+
+
+def bidder(rec, deadline, team, bid_api, target_price, interval):
+    rng = random.Random(team)
+    while time.monotonic() < deadline:
+        lot = rec.timed('get_current_player', db.get_current_player)
+        if lot is None:
+            next_lot(rec)
+            continue
+
+        current_bid = lot['current_bid'] or 0
+        if lot['status'] == 'Sold':
+            next_lot(rec)
+            continue
+        if current_bid >= target_price and lot['holding_team']:
+            sold = rec.timed('sell_player', db.sell_player, lot['id'], lot['holding_team'], current_bid)
+            if not sold:
+                with rec.lock:
+                    rec.sell_conflicts += 1
+            next_lot(rec)
+            continue
+        if lot['holding_team'] == team:
+            time.sleep(0.001)
+            continue
+
+        increment = rng.choice(INCREMENTS)
+        if bid_api == 'place_bid':
+            result = rec.timed('place_bid', db.place_bid, lot['id'], team, increment, current_bid, lot['holding_team'])
+            applied = result is not None and result.accepted
+            if result is not None and not result.accepted and result.reason and 'locked' in result.reason:
+                with rec.lock:
+                    rec.lock_errors['place_bid'] += 1
+        else:
+            applied = rec.timed('update_bid', db.update_bid, lot['id'], team, current_bid + increment)
+            if applied is False:
+                with rec.lock:
+                    rec.failures['update_bid'] += 1
+        if applied:
+            with rec.lock:
+                rec.added[lot['id']] += increment
+        if interval:
+            time.sleep(interval)
+
+
+def next_lot(rec):
+    unsold = rec.timed('get_players', db.get_players, ['id'], 'Unsold')
+    if unsold:
+        rec.timed('set_current_player', db.set_current_player, unsold[0]['id'])
+    else:
+        time.sleep(0.01)
+
+
+def worker(db_file, viewers, teams, args, results):
+    db.DB_FILE = db_file
+    rec = Recorder()
+    deadline = time.monotonic() + args.seconds
+    threads = [
+        threading.Thread(target=viewer, args=(rec, deadline, args.viewer_mode, args.viewer_interval))
+        for _ in range(viewers)
+    ] + [
+        threading.Thread(target=bidder, args=(rec, deadline, team, args.bid_api, args.target_price, args.bid_interval))
+        for team in teams
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.close_pool()
+    results.put(rec.result())
+
+
+def seed(n_players, n_teams):
+    db.init_db()
+    teams = [f"Team {i}" for i in range(n_teams)]
+    for team in teams:
+        db.add_team(team, 10 ** 12)
+    rows = ''.join(f"Player {i},{db.ROLES[i % len(db.ROLES)]}\n" for i in range(n_players))
+    db.import_players("name,role\n" + rows)
+    return teams
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--viewers', type=int, default=50, help="viewer threads in total")
+    parser.add_argument('--bidders', type=int, default=4, help="bidding teams in total")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--viewer-mode', choices=['direct', 'snapshot'], default='direct')
+    parser.add_argument('--viewer-interval', type=float, default=0.0, help="sleep between viewer polls")
+    parser.add_argument('--bid-api', choices=['update_bid', 'place_bid'], default='place_bid')
+    parser.add_argument('--bid-interval', type=float, default=0.0, help="sleep between bids")
+    parser.add_argument('--target-price', type=int, default=5000, help="sell a lot once it reaches this bid")
+    parser.add_argument('--output', help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, 'load.db')
+        teams = seed(args.players, args.bidders or 2)
+        db.close_pool()
+
+        procs, results = [], multiprocessing.Queue()
+        for i in range(args.processes):
+            viewers = len(range(i, args.viewers, args.processes))
+            bidders = teams[i::args.processes] if args.bidders else []
+            procs.append(multiprocessing.Process(target=worker, args=(db.DB_FILE, viewers, bidders, args, results)))
+
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        parts = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        final_bids = {p['id']: p['current_bid'] or 0 for p in db.get_players(['id', 'current_bid'])}
+        sold = len(db.get_players(['id'], 'Sold'))
+        db.close_pool()
+
+    latencies, lock_errors, failures, added = defaultdict(list), defaultdict(int), defaultdict(int), defaultdict(int)
+    for part in parts:
+        for op, values in part['latencies'].items():
+            latencies[op].extend(values)
+        for op, n in part['lock_errors'].items():
+            lock_errors[op] += n
+        for op, n in part['failures'].items():
+            failures[op] += n
+        for lot, n in part['added'].items():
+            added[lot] += n
+
+    operations = {}
+    for op, values in sorted(latencies.items()):
+        values.sort()
+        operations[op] = {
+            'calls': len(values),
+            'per_second': round(len(values) / elapsed, 1),
+            'p50_ms': percentile(values, 50),
+            'p95_ms': percentile(values, 95),
+            'p99_ms': percentile(values, 99),
+            'max_ms': percentile(values, 100),
+            'lock_errors': lock_errors.get(op, 0),
+            'failures': failures.get(op, 0),
+        }
+
+    lost = {lot: n - final_bids.get(lot, 0) for lot, n in added.items() if n != final_bids.get(lot, 0)}
+    report = {
+        'config': vars(args),
+        'elapsed_seconds': round(elapsed, 2),
+        'operations': operations,
+        'lots_sold': sold,
+        'sell_conflicts': sum(part['sell_conflicts'] for part in parts),
+        'lock_errors': sum(lock_errors.values()),
+        'lost_update_lots': len(lost),
+        'lost_update_amount': sum(lost.values()),
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Bursts of simultaneous raises against paddle_server.py.
+
+Starts the paddle service in-process on a temporary database, then fires
+bursts where every team raises the current lot at the same moment, each
+over its own keep-alive connection, and retries every raise once with the
+same bid_id. The report is JSON: ack latency percentiles, how many raises
+each burst accepted (one per burst when paddles send expected_bid), and
+whether the first raise to arrive won each burst and retries were answered
+consistently.
+
+    python benchmarks/paddle_burst.py --teams 40 --bursts 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from _common import percentile
+import db
+import paddle_server
+
+SECRET = 'benchmark'
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int([line for line in head.decode().split("\r\n") if line.lower().startswith('content-length')][0].split(': ')[1])
+    return json.loads(await reader.readexactly(length))
+
+
+async def run(args, port):
+    conns = [await asyncio.open_connection('127.0.0.1', port) for _ in range(args.teams)]
+    latencies, accepted_per_burst, problems = [], [], []
+    for _ in range(args.bursts):
+        state = await request(*conns[0], 'GET', '/state')
+        lot = state['lot']
+        if lot is None or lot['status'] == 'Sold':
+            await asyncio.to_thread(db.next_lot)
+            continue
+
+        async def raise_paddle(i):
+            payload = {
+                'team': f"Team {i}", 'token': paddle_server.paddle_token(SECRET, f"Team {i}"),
+                'player_id': lot['id'], 'increment': 100, 'bid_id': uuid.uuid4().hex,
+                'expected_bid': lot['bid'], 'expected_team': lot['team'],
+            }
+            start = time.perf_counter()
+            ack = await request(*conns[i], 'POST', '/bid', payload)
+            latencies.append(time.perf_counter() - start)
+            retry = await request(*conns[i], 'POST', '/bid', payload)
+            if retry != ack:
+                problems.append(f"retry of {payload['bid_id']} answered differently")
+            return ack
+
+        # Everyone but the team already holding the bid raises at once
+        raising = [i for i in range(args.teams) if f"Team {i}" != lot['team']]
+        acks = await asyncio.gather(*(raise_paddle(i) for i in raising))
+        acks.sort(key=lambda a: a['seq'])
+        winners = [a for a in acks if a['accepted']]
+        accepted_per_burst.append(len(winners))
+        if winners and winners[0] is not acks[0]:
+            problems.append(f"burst won by seq {winners[0]['seq']}, not the first arrival {acks[0]['seq']}")
+        if len({a['seq'] for a in acks}) != len(acks):
+            problems.append("duplicate sequence numbers")
+
+    for reader, writer in conns:
+        writer.close()
+        await writer.wait_closed()
+    latencies.sort()
+    return {
+        'config': vars(args),
+        'raises': len(latencies),
+        'ack_p50_ms': percentile(latencies, 50),
+        'ack_p95_ms': percentile(latencies, 95),
+        'ack_p99_ms': percentile(latencies, 99),
+        'accepted_per_burst': sorted(set(accepted_per_burst)),
+        'problems': problems,
+    }
+
+
+async def main_async(args):
+    ready = asyncio.get_running_loop().create_future()
+    server_task = asyncio.create_task(paddle_server.serve('127.0.0.1', 0, SECRET, ready.set_result))
+    server = await ready
+    report = await run(args, server.sockets[0].getsockname()[1])
+    await asyncio.sleep(0.1)  # let the server see the paddles hang up
+    server_task.cancel()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--teams', type=int, default=40)
+    parser.add_argument('--bursts', type=int, default=50)
+    parser.add_argument('--output', help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, 'paddles.db')
+        db.SNAPSHOT_MAX_AGE = 0
+        db.init_db()
+        for i in range(args.teams):
+            db.add_team(f"Team {i}", 10 ** 9)
+        db.import_players("name,role\n" + ''.join(f"Player {i},Batsman\n" for i in range(50)))
+        db.next_lot() or (db.build_lot_queue(seed=1), db.next_lot())
+        report = asyncio.run(main_async(args))
+        db.close_pool()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    if report['problems']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
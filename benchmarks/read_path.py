@@ -0,0 +1,120 @@
+"""Per-call latency and allocations of the db.py read path.
+
+Seeds a temporary database and times get_players/get_teams/get_team_stats.
+If pandas is installed, the old pd.read_sql(...).to_dict('records') readers
+are timed on the same data for comparison.
+
+    python benchmarks/read_path.py --players 2000 --teams 12
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from _common import percentile
+import db
+
+ROLES = ["Batsman", "Bowler", "All-Rounder", "Wicket Keeper"]
+
+
+def seed(n_players, n_teams):
+    db.init_db()
+    for t in range(n_teams):
+        db.add_team(f"Team {t}", 100000)
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO players (name, role, status, sold_to, price) VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"Player {i}", ROLES[i % 4], 'Sold' if i % 3 == 0 else 'Unsold',
+             f"Team {i % n_teams}" if i % 3 == 0 else None, 100 * (i % 50) if i % 3 == 0 else None)
+            for i in range(n_players)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def pandas_readers():
+    try:
+        import pandas as pd
+    except ImportError:
+        return {}
+
+    def get_players():
+        conn = db.get_connection()
+        df = pd.read_sql("SELECT * FROM players", conn)
+        conn.close()
+        return df.to_dict('records')
+
+    def get_teams():
+        conn = db.get_connection()
+        df = pd.read_sql("SELECT * FROM teams", conn)
+        conn.close()
+        return df.to_dict('records')
+
+    def get_team_stats():
+        conn = db.get_connection()
+        c = conn.cursor()
+        c.execute("SELECT * FROM teams WHERE name = ?", ("Team 0",))
+        team = c.fetchone()
+        players = pd.read_sql("SELECT * FROM players WHERE sold_to = ?", conn, params=("Team 0",))
+        conn.close()
+        return dict(team), players.to_dict('records')
+
+    return {
+        'pandas.get_players': get_players,
+        'pandas.get_teams': get_teams,
+        'pandas.get_team_stats': get_team_stats,
+    }
+
+
+def measure(fn, repeat):
+    fn()  # warm up connection and statement cache
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'peak_alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, 'bench.db')
+        seed(args.players, args.teams)
+
+        readers = {
+            'rows.get_players': db.get_players,
+            'rows.get_players(projected)': lambda: db.get_players(columns=['name', 'role', 'status', 'sold_to', 'price']),
+            'rows.get_teams': db.get_teams,
+            'rows.get_team_stats': lambda: db.get_team_stats("Team 0"),
+        }
+        readers.update(pandas_readers())
+
+        results = {name: measure(fn, args.repeat) for name, fn in readers.items()}
+        db.close_pool()
+
+    print(json.dumps({'players': args.players, 'teams': args.teams, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,226 @@
+import csv
+import io
+import itertools
+import json
+import os
+import random
+import re
 import sqlite3
-import pandas as pd
+import threading
+import time
+import zlib
+from collections import namedtuple
+from contextvars import ContextVar, copy_context
 
 DB_FILE = "auction.db"
 
-def get_connection():
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+# --- Auctions ---
+# Each auction lives in its own SQLite file with its own connection pool and
+# snapshot cache. The default auction is DB_FILE; others are stored under
+# AUCTIONS_DIR. use_auction() selects one for the current thread (and any
+# asyncio task or to_thread call started from it); everything else in this
+# module works on whichever auction is selected.
+DEFAULT_AUCTION = "default"
+AUCTIONS_DIR = "auctions"
+AUCTION_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+_auction_file = ContextVar('auction_file', default=None)
+_initialized_files = set()
+_init_lock = threading.Lock()
+
+def _db_file():
+    return _auction_file.get() or DB_FILE
+
+def auction_file(auction_id):
+    if auction_id == DEFAULT_AUCTION:
+        return DB_FILE
+    if not AUCTION_ID_PATTERN.match(auction_id or ''):
+        raise ValueError(f"Invalid auction id: {auction_id!r}")
+    return os.path.join(AUCTIONS_DIR, f"{auction_id}.db")
+
+def use_auction(auction_id):
+    # Creates the auction's database on first use
+    db_file = auction_file(auction_id)
+    if db_file != DB_FILE:
+        os.makedirs(AUCTIONS_DIR, exist_ok=True)
+    _auction_file.set(db_file)
+    with _init_lock:
+        if db_file not in _initialized_files:
+            init_db()
+            _initialized_files.add(db_file)
+    return db_file
+
+def current_auction():
+    db_file = _db_file()
+    if db_file == DB_FILE:
+        return DEFAULT_AUCTION
+    return os.path.splitext(os.path.basename(db_file))[0]
+
+def list_auctions():
+    names = []
+    if os.path.isdir(AUCTIONS_DIR):
+        names = sorted(
+            os.path.splitext(f)[0] for f in os.listdir(AUCTIONS_DIR)
+            if f.endswith('.db') and AUCTION_ID_PATTERN.match(os.path.splitext(f)[0])
+        )
+    return [DEFAULT_AUCTION] + [n for n in names if n != DEFAULT_AUCTION]
+
+# --- Connection Pool ---
+# Connections are opened once (WAL, relaxed fsync, busy timeout) and reused.
+# get_connection() hands one out and conn.close() puts it back, so callers
+# keep the usual open/close pattern.
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+class PooledConnection(sqlite3.Connection):
+    def close(self):
+        # Never hand out a connection with a half-finished transaction
+        if self.in_transaction:
+            self.rollback()
+        with _pool_lock:
+            idle = _pools.setdefault(self.db_file, [])
+            if len(idle) < POOL_SIZE:
+                idle.append(self)
+                return
+        sqlite3.Connection.close(self)
+
+def _open_connection(db_file):
+    # IMMEDIATE takes the write lock when a transaction starts, so two
+    # writers wait on busy_timeout instead of failing on lock upgrade.
+    conn = sqlite3.connect(
+        db_file,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level='IMMEDIATE',
+        check_same_thread=False,
+        factory=PooledConnection,
+        cached_statements=256,
+    )
+    conn.db_file = db_file
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
     return conn
 
+def get_connection(db_file=None):
+    db_file = db_file or _db_file()
+    with _pool_lock:
+        idle = _pools.get(db_file)
+        if idle:
+            return idle.pop()
+    return _open_connection(db_file)
+
+def close_pool():
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for idle in pools:
+        for conn in idle:
+            sqlite3.Connection.close(conn)
+
+# Bump when init_db() gains a migration for existing databases
+SCHEMA_VERSION = 10
+
+def _add_column(c, table, column, decl):
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in [row['name'] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def _create_player_search(c):
+    # FTS5 index over player names and categories, kept in step by triggers.
+    # Builds without FTS5 fall back to LIKE in query_players().
+    try:
+        c.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS players_fts
+            USING fts5(name, category, content='players', content_rowid='id')
+        """)
+    except sqlite3.OperationalError:
+        return
+    c.executescript("""
+        CREATE TRIGGER IF NOT EXISTS players_fts_insert AFTER INSERT ON players BEGIN
+            INSERT INTO players_fts (rowid, name, category) VALUES (new.id, new.name, new.category);
+        END;
+        CREATE TRIGGER IF NOT EXISTS players_fts_delete AFTER DELETE ON players BEGIN
+            INSERT INTO players_fts (players_fts, rowid, name, category) VALUES ('delete', old.id, old.name, old.category);
+        END;
+        CREATE TRIGGER IF NOT EXISTS players_fts_update AFTER UPDATE OF name, category ON players BEGIN
+            INSERT INTO players_fts (players_fts, rowid, name, category) VALUES ('delete', old.id, old.name, old.category);
+            INSERT INTO players_fts (rowid, name, category) VALUES (new.id, new.name, new.category);
+        END;
+        INSERT INTO players_fts (players_fts) VALUES ('rebuild');
+    """)
+
+def _role_column(role):
+    return role.lower().replace('-', '_').replace(' ', '_')
+
+def _summary_select(team):
+    # One team_summary row per team, computed from its sold players; team is
+    # an SQL expression (a parameter or new./old. inside a trigger)
+    roles = ''.join(
+        f", SUM(CASE WHEN p.role = '{role}' THEN 1 ELSE 0 END)" for role in ROLES
+    )
+    return f"""
+        SELECT t.name, t.budget, COALESCE(SUM(p.price), 0), t.budget - COALESCE(SUM(p.price), 0),
+               COUNT(p.id), t.max_players{roles},
+               CASE WHEN t.max_players > 0 AND COUNT(p.id) >= t.max_players THEN 0
+                    ELSE MAX(t.budget - COALESCE(SUM(p.price), 0), 0) END
+        FROM teams t
+        LEFT JOIN players p ON p.sold_to = t.name AND p.status = 'Sold'
+        WHERE t.name = {team}
+        GROUP BY t.name
+    """
+
+def _create_team_summary(c):
+    # Standings per team, kept in step by triggers on players and teams so
+    # reads are a primary-key lookup instead of a grouped join. Bids do not
+    # touch the columns the triggers watch, so the bid path pays nothing.
+    role_columns = ''.join(f", {_role_column(role)} INTEGER NOT NULL DEFAULT 0" for role in ROLES)
+    c.execute(f"""
+        CREATE TABLE IF NOT EXISTS team_summary (
+            team TEXT PRIMARY KEY,
+            budget INTEGER,
+            spent INTEGER NOT NULL DEFAULT 0,
+            remaining INTEGER,
+            players INTEGER NOT NULL DEFAULT 0,
+            max_players INTEGER{role_columns},
+            max_bid INTEGER -- what the team can still bid: 0 once the squad is full
+        ) WITHOUT ROWID
+    """)
+    refresh = "INSERT OR REPLACE INTO team_summary " + _summary_select("{team}") + ";"
+    c.executescript(f"""
+        CREATE TRIGGER IF NOT EXISTS team_summary_player_insert AFTER INSERT ON players
+        WHEN new.sold_to IS NOT NULL BEGIN
+            {refresh.format(team='new.sold_to')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS team_summary_player_delete AFTER DELETE ON players
+        WHEN old.sold_to IS NOT NULL BEGIN
+            {refresh.format(team='old.sold_to')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS team_summary_player_update AFTER UPDATE OF status, sold_to, price, role ON players BEGIN
+            {refresh.format(team='old.sold_to')}
+            {refresh.format(team='new.sold_to')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS team_summary_team_insert AFTER INSERT ON teams BEGIN
+            {refresh.format(team='new.name')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS team_summary_team_update AFTER UPDATE OF budget, max_players ON teams BEGIN
+            {refresh.format(team='new.name')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS team_summary_team_delete AFTER DELETE ON teams BEGIN
+            DELETE FROM team_summary WHERE team = old.name;
+        END;
+    """)
+    _rebuild_team_summary(c)
+
+def _rebuild_team_summary(c):
+    c.execute("DELETE FROM team_summary")
+    c.execute("SELECT name FROM teams")
+    for row in c.fetchall():
+        c.execute("INSERT INTO team_summary " + _summary_select("?"), (row['name'],))
+
 def init_db():
     conn = get_connection()
     c = conn.cursor()
@@ -17,7 +230,8 @@ def init_db():
         CREATE TABLE IF NOT EXISTS teams (
             name TEXT PRIMARY KEY,
             budget INTEGER,
-            spent INTEGER DEFAULT 0
+            spent INTEGER DEFAULT 0,
+            max_players INTEGER -- NULL means no squad limit
         )
     ''')
     
@@ -30,13 +244,55 @@ def init_db():
             status TEXT DEFAULT 'Unsold', -- Unsold, Sold
             sold_to TEXT,
             price INTEGER,
-            is_current BOOLEAN DEFAULT 0,
             current_bid INTEGER DEFAULT 0,
             holding_team TEXT,
+            base_price INTEGER,
+            category TEXT,
             FOREIGN KEY(sold_to) REFERENCES teams(name)
         )
     ''')
 
+    # Auction State Table (single row): version is bumped by every writer
+    # so viewers can cheaply tell whether anything changed, and
+    # current_player_id points at the lot on the floor. lot_deadline is the
+    # epoch time the lot closes (NULL when the lot timer is off).
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS auction_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0,
+            current_player_id INTEGER,
+            current_round INTEGER,
+            queue_seed INTEGER,
+            lot_seconds INTEGER,
+            bid_extension INTEGER,
+            lot_deadline REAL,
+            journal_seq INTEGER -- last write-behind journal entry flushed here (memory_backend.py)
+        )
+    ''')
+    c.execute("INSERT OR IGNORE INTO auction_state (id, version) VALUES (1, 0)")
+
+    # Lot Queue: upcoming lots in the order they will be called
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS lot_queue (
+            position INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id INTEGER NOT NULL,
+            set_name TEXT,
+            round INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+
+    # Events Table: append-only log of every state change, in order
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            kind TEXT NOT NULL, -- bid, sale, unsell, lot, pass, dismiss, queue, add_team, add_player, remove_player, import_teams, import_players, reset, restore
+            player_id INTEGER,
+            team TEXT,
+            amount INTEGER
+        )
+    ''')
+
     # Users Table
     c.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -44,13 +300,478 @@ def init_db():
             password TEXT
         )
     ''')
+
+    # Indexes for the lookup columns
+    c.execute("CREATE INDEX IF NOT EXISTS idx_players_name ON players(name)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_players_status ON players(status)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_players_sold_to ON players(sold_to)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_kind_player ON events(kind, player_id)")
+
+    # --- Migrations ---
+    c.execute("PRAGMA user_version")
+    schema_version = c.fetchone()[0]
+
+    if schema_version < 1:
+        # The current lot used to be an is_current flag on players
+        _add_column(c, 'auction_state', 'current_player_id', 'INTEGER')
+        c.execute("PRAGMA table_info(players)")
+        if 'is_current' in [row['name'] for row in c.fetchall()]:
+            c.execute("""
+                UPDATE auction_state
+                SET current_player_id = (SELECT id FROM players WHERE is_current = 1 LIMIT 1)
+                WHERE id = 1 AND current_player_id IS NULL
+            """)
+            c.execute("UPDATE players SET is_current = 0 WHERE is_current = 1")
+
+    if schema_version < 2:
+        _add_column(c, 'teams', 'max_players', 'INTEGER')
+
+    if schema_version < 3:
+        _add_column(c, 'players', 'base_price', 'INTEGER')
+        _add_column(c, 'players', 'category', 'TEXT')
+
+    if schema_version < 4:
+        _create_player_search(c)
+
+    if schema_version < 5:
+        _add_column(c, 'auction_state', 'current_round', 'INTEGER')
+        _add_column(c, 'auction_state', 'queue_seed', 'INTEGER')
+
+    if schema_version < 6:
+        _add_column(c, 'auction_state', 'lot_seconds', 'INTEGER')
+        _add_column(c, 'auction_state', 'bid_extension', 'INTEGER')
+        _add_column(c, 'auction_state', 'lot_deadline', 'REAL')
+
+    if schema_version < 7:
+        _create_team_summary(c)
+
+    if schema_version < 8:
+        _add_column(c, 'auction_state', 'journal_seq', 'INTEGER')
+
+    if schema_version < 9:
+        # Compressed copies of the whole auction, see take_state_snapshot()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS state_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                seq INTEGER NOT NULL, -- last event included in the copy
+                ts REAL NOT NULL,
+                reason TEXT NOT NULL,
+                data BLOB NOT NULL
+            )
+        ''')
+        c.execute("CREATE INDEX IF NOT EXISTS idx_state_snapshots_seq ON state_snapshots(seq)")
+
+    if schema_version < 10:
+        # Covers the slot price lookup every bid makes, see _slot_prices()
+        c.execute("CREATE INDEX IF NOT EXISTS idx_players_status_role_price ON players(status, role, base_price)")
+
+    c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     
     conn.commit()
     conn.close()
 
+def _bump_version(c):
+    # Must run on the writer's cursor so the bump commits with the change
+    c.execute("UPDATE auction_state SET version = version + 1 WHERE id = 1")
+    _checkpoint(c)
+
+def _log_event(c, kind, player_id=None, team=None, amount=None):
+    # Same rule as _bump_version: the event commits with the change it describes
+    c.execute(
+        "INSERT INTO events (ts, kind, player_id, team, amount) VALUES (?, ?, ?, ?, ?)",
+        (time.time(), kind, player_id, team, amount),
+    )
+
+def get_state_version():
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT version FROM auction_state WHERE id = 1")
+    row = c.fetchone()
+    conn.close()
+    return row['version'] if row else 0
+
+# --- Shared Snapshot ---
+# One read-only copy of the live auction state per process, shared by every
+# Streamlit session. Writers in this process mark it stale as soon as they
+# commit; changes made by other processes are noticed by re-checking the
+# state version at most every SNAPSHOT_MAX_AGE seconds. A stale snapshot is
+# brought up to date by replaying the events logged since its cursor, and
+# only reloaded in full when the pool or the teams themselves changed.
+SNAPSHOT_MAX_AGE = 1.0
+MAX_DELTA_EVENTS = 200
+DELTA_EVENT_KINDS = ('bid', 'sale', 'lot', 'pass', 'dismiss')
+
+AuctionSnapshot = namedtuple('AuctionSnapshot', [
+    'version', 'cursor', 'current_player', 'players', 'teams', 'recent_sales', 'player_index', 'lot_deadline',
+    'standings',
+])
+
+class SnapshotCache:
+    def __init__(self):
+        self.snapshot = None
+        self.checked = 0.0
+        self.generation = 0
+        self.lock = threading.Lock()
+
+_snapshot_caches = {}
+
+def _snapshot_cache():
+    db_file = _db_file()
+    cache = _snapshot_caches.get(db_file)
+    if cache is None:
+        with _pool_lock:
+            cache = _snapshot_caches.setdefault(db_file, SnapshotCache())
+    return cache
+
+def invalidate_snapshot():
+    # Keep the old snapshot around as the base for the next delta
+    cache = _snapshot_cache()
+    cache.generation += 1
+    cache.checked = 0.0
+
+def _load_snapshot():
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        # One read transaction, so the cursor matches the rows exactly
+        c.execute("BEGIN DEFERRED")
+        c.execute("SELECT version, current_player_id, lot_deadline FROM auction_state WHERE id = 1")
+        state = c.fetchone()
+        c.execute("SELECT COALESCE(MAX(seq), 0) FROM events")
+        cursor = c.fetchone()[0]
+        c.execute("SELECT * FROM players ORDER BY id")
+        players = tuple(dict(row) for row in c.fetchall())
+        c.execute("SELECT * FROM teams")
+        teams = tuple(dict(row) for row in c.fetchall())
+        standings = _load_standings(c)
+        recent_ids = [row['id'] for row in _recent_sales(c, RECENT_SALES)]
+        conn.commit()
+    finally:
+        conn.close()
+
+    player_index = {p['id']: i for i, p in enumerate(players)}
+    current_id = state['current_player_id']
+    current_player = players[player_index[current_id]] if current_id in player_index else None
+    recent_sales = tuple(players[player_index[pid]] for pid in recent_ids)
+    return AuctionSnapshot(
+        state['version'], cursor, current_player, players, teams, recent_sales, player_index, state['lot_deadline'],
+        standings,
+    )
+
+def _load_standings(c):
+    c.execute(_standings_select() + " JOIN teams t ON t.name = s.team ORDER BY t.rowid")
+    return tuple(dict(row) for row in c.fetchall())
+
+def _apply_events(snap):
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN DEFERRED")
+        c.execute("SELECT version, lot_deadline FROM auction_state WHERE id = 1")
+        state = c.fetchone()
+        c.execute("SELECT * FROM events WHERE seq > ? ORDER BY seq LIMIT ?", (snap.cursor, MAX_DELTA_EVENTS + 1))
+        events = [dict(row) for row in c.fetchall()]
+        # Standings only move when something is sold
+        standings = _load_standings(c) if any(e['kind'] == 'sale' for e in events) else snap.standings
+        conn.commit()
+    finally:
+        conn.close()
+
+    if len(events) > MAX_DELTA_EVENTS or any(e['kind'] not in DELTA_EVENT_KINDS for e in events):
+        return None
+
+    players = list(snap.players)
+    teams = list(snap.teams)
+    recent_sales = list(snap.recent_sales)
+    current_id = snap.current_player['id'] if snap.current_player else None
+    cursor = snap.cursor
+
+    for e in events:
+        cursor = e['seq']
+        if e['kind'] in ('pass', 'dismiss'):
+            current_id = None
+            continue
+        pos = snap.player_index.get(e['player_id'])
+        if pos is None:
+            return None
+        if e['kind'] == 'lot':
+            current_id = e['player_id']
+            continue
+
+        player = dict(players[pos])
+        if e['kind'] == 'bid':
+            player['current_bid'] = e['amount']
+            player['holding_team'] = e['team']
+        elif e['kind'] == 'sale':
+            player.update(status='Sold', sold_to=e['team'], price=e['amount'])
+            teams = [dict(t, spent=t['spent'] + e['amount']) if t['name'] == e['team'] else t for t in teams]
+            recent_sales = [player] + [p for p in recent_sales if p['id'] != player['id']][:RECENT_SALES - 1]
+        players[pos] = player
+
+    current_player = players[snap.player_index[current_id]] if current_id in snap.player_index else None
+    return AuctionSnapshot(
+        state['version'], cursor, current_player, tuple(players), tuple(teams), tuple(recent_sales),
+        snap.player_index, state['lot_deadline'], standings,
+    )
+
+def get_snapshot():
+    cache = _snapshot_cache()
+    snap = cache.snapshot
+    if snap is not None and time.monotonic() - cache.checked < SNAPSHOT_MAX_AGE:
+        return snap
+
+    with cache.lock:
+        # Another session may have refreshed it while we waited
+        snap = cache.snapshot
+        if snap is not None and time.monotonic() - cache.checked < SNAPSHOT_MAX_AGE:
+            return snap
+
+        generation = cache.generation
+        if snap is None:
+            snap = _load_snapshot()
+        elif snap.version != get_state_version():
+            snap = _apply_events(snap) or _load_snapshot()
+        # Don't cache data read while a local writer was committing
+        if generation == cache.generation:
+            cache.snapshot = snap
+            cache.checked = time.monotonic()
+        return snap
+
+# --- Event Log ---
+RECENT_SALES = 5
+
+def get_events_since(cursor=0, limit=500):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT * FROM events WHERE seq > ? ORDER BY seq LIMIT ?", (cursor, limit))
+    rows = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return rows
+
+# --- State Snapshots ---
+# The event log doubles as the bid journal. The whole auction is copied
+# into state_snapshots at a lot boundary (a lot coming up, or a sale) once
+# SNAPSHOT_EVERY events have passed since the last copy, or once any change
+# the log cannot replay (setup, imports, the queue) has happened since, so
+# a run of setup changes costs one copy, not one each. Bids never take a
+# copy. Resets and restores are copied straight away. restore() starts
+# from the newest copy at or before the chosen event and replays the events
+# after it, roughly SNAPSHOT_EVERY plus one lot's bids at most, so it takes
+# the same time at the end of a long auction as at the start.
+SNAPSHOT_EVERY = 200
+SNAPSHOTS_KEPT = 100
+REPLAYABLE_KINDS = ('bid', 'sale', 'unsell', 'lot', 'pass', 'dismiss')
+LOT_BOUNDARY_KINDS = ('lot', 'sale')
+IMMEDIATE_SNAPSHOT_KINDS = ('reset', 'restore')
+LOT_QUEUE_COLUMNS = ('position', 'player_id', 'set_name', 'round')
+
+def _checkpoint(c):
+    c.execute("""
+        SELECT (SELECT MAX(seq) FROM events) AS seq,
+               (SELECT kind FROM events ORDER BY seq DESC LIMIT 1) AS kind,
+               (SELECT MAX(seq) FROM state_snapshots) AS snapshot_seq
+    """)
+    row = c.fetchone()
+    if row['seq'] is None or row['seq'] == row['snapshot_seq']:
+        return
+    if row['kind'] in IMMEDIATE_SNAPSHOT_KINDS:
+        _take_state_snapshot(c, row['kind'], row['seq'])
+        return
+    if row['kind'] not in LOT_BOUNDARY_KINDS:
+        return
+    if row['snapshot_seq'] is None or row['seq'] - row['snapshot_seq'] >= SNAPSHOT_EVERY:
+        _take_state_snapshot(c, 'interval', row['seq'])
+        return
+    placeholders = ', '.join('?' * len(REPLAYABLE_KINDS))
+    c.execute(
+        f"SELECT 1 FROM events WHERE seq > ? AND kind NOT IN ({placeholders}) LIMIT 1",
+        (row['snapshot_seq'], *REPLAYABLE_KINDS),
+    )
+    if c.fetchone() is not None:
+        _take_state_snapshot(c, 'setup', row['seq'])
+
+def _take_state_snapshot(c, reason, seq):
+    c.execute("SELECT MAX(id) AS id, MAX(seq) AS seq FROM state_snapshots")
+    previous = c.fetchone()
+    if previous['id'] is not None:
+        # A run of setup changes keeps only its latest copy
+        placeholders = ', '.join('?' * len(REPLAYABLE_KINDS))
+        c.execute(
+            f"SELECT 1 FROM events WHERE seq > ? AND kind IN ({placeholders}) LIMIT 1",
+            (previous['seq'], *REPLAYABLE_KINDS),
+        )
+        if c.fetchone() is None:
+            c.execute("DELETE FROM state_snapshots WHERE id = ?", (previous['id'],))
+
+    c.execute(f"SELECT {', '.join(PLAYER_COLUMNS)} FROM players ORDER BY id")
+    players = [list(row) for row in c.fetchall()]
+    c.execute(f"SELECT {', '.join(TEAM_COLUMNS)} FROM teams ORDER BY rowid")
+    teams = [list(row) for row in c.fetchall()]
+    c.execute(f"SELECT {', '.join(LOT_QUEUE_COLUMNS)} FROM lot_queue ORDER BY position")
+    queue = [list(row) for row in c.fetchall()]
+    c.execute("SELECT current_player_id, current_round, queue_seed FROM auction_state WHERE id = 1")
+    state = list(c.fetchone())
+    data = zlib.compress(json.dumps({
+        'players': players, 'teams': teams, 'lot_queue': queue, 'state': state,
+    }, separators=(',', ':')).encode())
+
+    c.execute(
+        "INSERT INTO state_snapshots (seq, ts, reason, data) VALUES (?, ?, ?, ?)",
+        (seq, time.time(), reason, data),
+    )
+    c.execute("""
+        DELETE FROM state_snapshots WHERE id NOT IN (
+            SELECT id FROM state_snapshots ORDER BY id DESC LIMIT ?
+        )
+    """, (SNAPSHOTS_KEPT,))
+
+def take_state_snapshot(reason='manual'):
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("SELECT COALESCE(MAX(seq), 0) FROM events")
+        _take_state_snapshot(c, reason, c.fetchone()[0])
+        conn.commit()
+    finally:
+        conn.close()
+
+def list_state_snapshots():
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT id, seq, ts, reason, LENGTH(data) AS size FROM state_snapshots ORDER BY id DESC")
+    rows = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return rows
+
+def list_sales(limit=20):
+    # Sale events, newest first: the points an admin may roll back to
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("""
+        SELECT e.seq, e.ts, e.player_id, p.name, e.team, e.amount FROM events e
+        LEFT JOIN players p ON p.id = e.player_id
+        WHERE e.kind = 'sale'
+        ORDER BY e.seq DESC
+        LIMIT ?
+    """, (limit,))
+    rows = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return rows
+
+def _replay_event(c, e):
+    player_id, team, amount = e['player_id'], e['team'], e['amount']
+    if e['kind'] == 'bid':
+        c.execute("UPDATE players SET current_bid = ?, holding_team = ? WHERE id = ?", (amount, team, player_id))
+    elif e['kind'] == 'sale':
+        c.execute("UPDATE players SET status = 'Sold', sold_to = ?, price = ? WHERE id = ?", (team, amount, player_id))
+        c.execute("UPDATE teams SET spent = spent + COALESCE(?, 0) WHERE name = ?", (amount, team))
+    elif e['kind'] == 'unsell':
+        c.execute("UPDATE players SET status = 'Unsold', sold_to = NULL, price = NULL WHERE id = ?", (player_id,))
+        c.execute("UPDATE teams SET spent = spent - COALESCE(?, 0) WHERE name = ?", (amount, team))
+        c.execute("UPDATE auction_state SET current_player_id = NULL WHERE id = 1 AND current_player_id = ?", (player_id,))
+    elif e['kind'] == 'lot':
+        if amount is not None:
+            # Came off the queue (next_lot logs the round); drop it and the lots it skipped
+            c.execute(
+                "DELETE FROM lot_queue WHERE position <= (SELECT MIN(position) FROM lot_queue WHERE player_id = ?)",
+                (player_id,),
+            )
+        c.execute("UPDATE auction_state SET current_player_id = ?, current_round = ? WHERE id = 1", (player_id, amount))
+    elif e['kind'] == 'pass':
+        if amount == 2:
+            c.execute("""
+                INSERT INTO lot_queue (player_id, set_name, round)
+                SELECT ?, ?, 2 WHERE NOT EXISTS (SELECT 1 FROM lot_queue WHERE player_id = ?)
+            """, (player_id, ACCELERATED_SET, player_id))
+        c.execute("UPDATE auction_state SET current_player_id = NULL, current_round = NULL WHERE id = 1")
+    elif e['kind'] == 'dismiss':
+        c.execute("UPDATE auction_state SET current_player_id = NULL WHERE id = 1")
+
+def restore(snapshot=None, until=None):
+    # Puts the auction back as it was right after event `until` (default:
+    # the latest event), starting from state snapshot id `snapshot` (default:
+    # the newest one at or before `until`). The restore is logged as an
+    # event, so the events after `until` stay in the log as history.
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        if until is None:
+            c.execute("SELECT COALESCE(MAX(seq), 0) FROM events")
+            until = c.fetchone()[0]
+        if snapshot is None:
+            c.execute("SELECT * FROM state_snapshots WHERE seq <= ? ORDER BY seq DESC, id DESC LIMIT 1", (until,))
+        else:
+            c.execute("SELECT * FROM state_snapshots WHERE id = ?", (snapshot,))
+        snap = c.fetchone()
+        if snap is None or snap['seq'] > until:
+            raise ValueError(f"No state snapshot at or before event {until}")
+
+        c.execute("SELECT * FROM events WHERE seq > ? AND seq <= ? ORDER BY seq", (snap['seq'], until))
+        events = [dict(row) for row in c.fetchall()]
+        not_replayable = [e['seq'] for e in events if e['kind'] not in REPLAYABLE_KINDS]
+        if not_replayable:
+            raise ValueError(f"Event {not_replayable[0]} cannot be replayed; pick a later point")
+
+        data = json.loads(zlib.decompress(snap['data']))
+        c.execute("DELETE FROM lot_queue")
+        c.execute("DELETE FROM players")
+        c.execute("DELETE FROM teams")
+        c.executemany(
+            f"INSERT INTO teams ({', '.join(TEAM_COLUMNS)}) VALUES ({', '.join('?' * len(TEAM_COLUMNS))})",
+            data['teams'],
+        )
+        c.executemany(
+            f"INSERT INTO players ({', '.join(PLAYER_COLUMNS)}) VALUES ({', '.join('?' * len(PLAYER_COLUMNS))})",
+            data['players'],
+        )
+        c.executemany(
+            f"INSERT INTO lot_queue ({', '.join(LOT_QUEUE_COLUMNS)}) VALUES ({', '.join('?' * len(LOT_QUEUE_COLUMNS))})",
+            data['lot_queue'],
+        )
+        # The lot clock does not survive a restore; the admin brings the lot up again
+        c.execute(
+            "UPDATE auction_state SET current_player_id = ?, current_round = ?, queue_seed = ?, lot_deadline = NULL WHERE id = 1",
+            data['state'],
+        )
+        for e in events:
+            _replay_event(c, e)
+
+        _log_event(c, 'restore', amount=until)
+        _bump_version(c)
+        conn.commit()
+        invalidate_snapshot()
+        return {'snapshot': snap['id'], 'snapshot_seq': snap['seq'], 'until': until, 'replayed': len(events)}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def _recent_sales(c, limit):
+    # Players still sold, most recent sale first
+    c.execute("""
+        SELECT p.* FROM players p
+        JOIN (SELECT player_id, MAX(seq) AS seq FROM events WHERE kind = 'sale' GROUP BY player_id) s
+            ON s.player_id = p.id
+        WHERE p.status = 'Sold'
+        ORDER BY s.seq DESC
+        LIMIT ?
+    """, (limit,))
+    return [dict(row) for row in c.fetchall()]
+
+def get_recent_sales(limit=RECENT_SALES):
+    conn = get_connection()
+    c = conn.cursor()
+    rows = _recent_sales(c, limit)
+    conn.close()
+    return rows
+
 # --- User Operations ---
+# Users are shared by every auction and live in the default database
 def create_user(username, password):
-    conn = get_connection()
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     try:
         c.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
@@ -64,7 +785,7 @@ def create_user(username, password):
         conn.close()
 
 def check_user(username, password):
-    conn = get_connection()
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     c.execute("SELECT password FROM users WHERE username = ?", (username,))
     row = c.fetchone()
@@ -74,90 +795,349 @@ def check_user(username, password):
         return True
     return False
 
+# --- Row Helpers ---
+# Reads return plain dicts built from sqlite3.Row. Callers can ask for a
+# subset of these columns to keep rows small.
+ROLES = ('Batsman', 'Bowler', 'All-Rounder', 'Wicket Keeper')
+TEAM_COLUMNS = ('name', 'budget', 'spent', 'max_players')
+PLAYER_COLUMNS = (
+    'id', 'name', 'role', 'status', 'sold_to', 'price', 'current_bid', 'holding_team', 'base_price', 'category',
+)
+
+def _select_list(columns, allowed):
+    if columns is None:
+        return '*'
+    unknown = [col for col in columns if col not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+    return ', '.join(columns)
+
+# --- Squad Reserve ---
+# Every squad place a team still has to fill costs at least the cheapest
+# unsold base price (never less than MIN_SLOT_PRICE), and role minimums
+# (AUCTION_ROLE_MINIMUMS, e.g. "Wicket Keeper=1,Bowler=4") say which roles
+# some of those places must go to. check_bid() refuses a bid that would eat
+# into that reserve; analytics.py works out the same limits for every team
+# at once for display.
+MIN_SLOT_PRICE = int(os.environ.get('AUCTION_MIN_SLOT_PRICE', '100'))  # the smallest raise
+
+def _parse_minimums(text):
+    minimums = dict.fromkeys(ROLES, 0)
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        role, _, count = item.partition('=')
+        if role.strip() not in minimums:
+            raise ValueError(f"AUCTION_ROLE_MINIMUMS: unknown role {role.strip()!r}")
+        minimums[role.strip()] = int(count)
+    return tuple(minimums[role] for role in ROLES)
+
+ROLE_MINIMUMS = _parse_minimums(os.environ.get('AUCTION_ROLE_MINIMUMS', ''))
+
+def slot_prices(cheapest):
+    # cheapest maps each role to its lowest unsold base price (None counts
+    # as 0). Returns the price of a place per role in ROLES, then of a place
+    # any role can fill. Players outside ROLES are not counted.
+    floors = {role: max(price or 0, MIN_SLOT_PRICE) for role, price in cheapest.items() if role in ROLES}
+    any_price = min(floors.values(), default=MIN_SLOT_PRICE)
+    # A role with nobody left still has to be filled somehow; price it like any place
+    return tuple(floors.get(role, any_price) for role in ROLES) + (any_price,)
+
+def _slot_prices(c):
+    # One index seek per role; NULL base prices sort first
+    cheapest = {}
+    for role in ROLES:
+        c.execute(
+            "SELECT base_price FROM players WHERE status = 'Unsold' AND role = ? ORDER BY base_price LIMIT 1",
+            (role,),
+        )
+        row = c.fetchone()
+        if row is not None:
+            cheapest[role] = row[0]
+    return slot_prices(cheapest)
+
+def squad_limits(team, prices, role=None, minimums=None):
+    # Returns (reserve, max_bid) for a standing (remaining, players,
+    # max_players and a count per role): what the team must keep to complete
+    # its squad, and the most it can bid for a player of role. max_bid is 0
+    # once the squad is full, or when the player would take a place the
+    # minimums need for another role.
+    minimums = ROLE_MINIMUMS if minimums is None else minimums
+    shortfall = {r: max(minimum - (team[r] or 0), 0) for r, minimum in zip(ROLES, minimums)}
+    short_total = sum(shortfall.values())
+    cap = team['max_players'] or 0
+    required = max(cap - team['players'], short_total) if cap else short_total
+    spare = required - short_total  # places any role can fill
+    reserve = sum(shortfall[r] * prices[i] for i, r in enumerate(ROLES)) + spare * prices[-1]
+    if cap and team['players'] >= cap:
+        return reserve, 0
+    # Buying the player frees the reserve held for the place they fill
+    if role in ROLES and shortfall[role]:
+        freed = prices[ROLES.index(role)]
+    elif spare:
+        freed = prices[-1]
+    elif cap:
+        return reserve, 0
+    else:
+        freed = 0
+    return reserve, max(team['remaining'] - (reserve - freed), 0)
+
 # --- Team Operations ---
-def add_team(name, budget):
+def add_team(name, budget, max_players=None):
     conn = get_connection()
     c = conn.cursor()
     try:
-        c.execute("INSERT INTO teams (name, budget) VALUES (?, ?)", (name, budget))
+        c.execute("INSERT INTO teams (name, budget, max_players) VALUES (?, ?, ?)", (name, budget, max_players))
+        _log_event(c, 'add_team', team=name, amount=budget)
+        _bump_version(c)
         conn.commit()
+        invalidate_snapshot()
         return True
     except sqlite3.IntegrityError:
         return False
     finally:
         conn.close()
 
-def get_teams():
+def get_teams(columns=None):
+    select = _select_list(columns, TEAM_COLUMNS)
     conn = get_connection()
-    df = pd.read_sql("SELECT * FROM teams", conn)
+    c = conn.cursor()
+    c.execute(f"SELECT {select} FROM teams")
+    rows = [dict(row) for row in c.fetchall()]
     conn.close()
-    return df.to_dict('records')
+    return rows
 
-def get_team_stats(team_name):
+def get_team_stats(team_name, columns=None):
+    select = _select_list(columns, PLAYER_COLUMNS)
     conn = get_connection()
     c = conn.cursor()
     c.execute("SELECT * FROM teams WHERE name = ?", (team_name,))
     team = c.fetchone()
     
     # Get players
-    players = pd.read_sql("SELECT * FROM players WHERE sold_to = ?", conn, params=(team_name,))
+    c.execute(f"SELECT {select} FROM players WHERE sold_to = ?", (team_name,))
+    players = [dict(row) for row in c.fetchall()]
     conn.close()
     
     if team:
-        return dict(team), players.to_dict('records')
+        return dict(team), players
     return None, []
 
+# Standings come from team_summary, with a count column per role named
+# after the role itself
+def _standings_select():
+    role_columns = ''.join(f', s.{_role_column(role)} AS "{role}"' for role in ROLES)
+    return f"""
+        SELECT s.team AS name, s.budget, s.spent, s.remaining, s.players, s.max_players, s.max_bid{role_columns}
+        FROM team_summary s
+    """
+
+def get_squad_summary():
+    conn = get_connection()
+    c = conn.cursor()
+    rows = list(_load_standings(c))
+    conn.close()
+    return rows
+
+def get_team_summary(team_name):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(_standings_select() + " WHERE s.team = ?", (team_name,))
+    row = c.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def check_team_summary(repair=False):
+    # Recomputes every team's standings from the players table and returns
+    # the teams whose team_summary row or teams.spent disagree with it
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE" if repair else "BEGIN DEFERRED")
+        c.execute("SELECT * FROM team_summary")
+        stored = {row['team']: tuple(row) for row in c.fetchall()}
+        c.execute("SELECT name, spent FROM teams")
+        teams = c.fetchall()
+        drifted = []
+        for team in teams:
+            c.execute(_summary_select("?"), (team['name'],))
+            expected = tuple(c.fetchone())
+            if stored.pop(team['name'], None) != expected or team['spent'] != expected[2]:
+                drifted.append(team['name'])
+        drifted.extend(stored)  # rows left over for teams that no longer exist
+
+        if repair and drifted:
+            _rebuild_team_summary(c)
+            c.execute("UPDATE teams SET spent = (SELECT spent FROM team_summary WHERE team = teams.name)")
+            # Not a delta kind, so shared snapshots reload in full
+            _log_event(c, 'repair', amount=len(drifted))
+            _bump_version(c)
+            conn.commit()
+            invalidate_snapshot()
+        else:
+            conn.rollback()
+        return drifted
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def get_team_squad(team_name, columns=None):
+    select = _select_list(columns, PLAYER_COLUMNS)
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(f"""
+        SELECT {select} FROM players
+        WHERE sold_to = ? AND status = 'Sold'
+        ORDER BY id
+    """, (team_name,))
+    rows = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return rows
+
 # --- Player Operations ---
-def add_player(name, role):
+def add_player(name, role, base_price=None, category=None):
     conn = get_connection()
     c = conn.cursor()
-    c.execute("INSERT INTO players (name, role) VALUES (?, ?)", (name, role))
+    c.execute(
+        "INSERT INTO players (name, role, base_price, category) VALUES (?, ?, ?, ?)",
+        (name, role, base_price, category),
+    )
+    _log_event(c, 'add_player', player_id=c.lastrowid)
+    _bump_version(c)
     conn.commit()
+    invalidate_snapshot()
     conn.close()
 
-def get_players():
+def get_players(columns=None, status=None):
+    select = _select_list(columns, PLAYER_COLUMNS)
     conn = get_connection()
-    df = pd.read_sql("SELECT * FROM players", conn)
+    c = conn.cursor()
+    if status:
+        c.execute(f"SELECT {select} FROM players WHERE status = ?", (status,))
+    else:
+        c.execute(f"SELECT {select} FROM players")
+    rows = [dict(row) for row in c.fetchall()]
     conn.close()
-    return df.to_dict('records')
+    return rows
+
+# --- Player Search ---
+# One page of the pool at a time, filtered and sorted in SQL, so the
+# payload per refresh stays the same size however big the pool gets.
+PlayerPage = namedtuple('PlayerPage', ['rows', 'total'])
+
+def _fts_query(search):
+    # Every word must match as a prefix, e.g. "vir ko" finds "Virat Kohli"
+    words = [w.replace('"', '') for w in search.split()]
+    return ' '.join(f'"{w}"*' for w in words if w)
+
+def query_players(page=0, page_size=50, sort='id', descending=False,
+                  role=None, status=None, team=None, search=None, columns=None):
+    if sort not in PLAYER_COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort}")
+    select = _select_list(columns, PLAYER_COLUMNS)
+
+    filters, params = [], []
+    if role:
+        filters.append("role = ?")
+        params.append(role)
+    if status:
+        filters.append("status = ?")
+        params.append(status)
+    if team:
+        filters.append("sold_to = ?")
+        params.append(team)
 
-def remove_player(name):
     conn = get_connection()
     c = conn.cursor()
-    c.execute("DELETE FROM players WHERE name = ?", (name,))
+    try:
+        search_filters, search_params = [], []
+        match = _fts_query(search or '')
+        if match:
+            search_filters.append("id IN (SELECT rowid FROM players_fts WHERE players_fts MATCH ?)")
+            search_params.append(match)
+
+        def run(search_filters, search_params):
+            where = filters + search_filters
+            where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+            all_params = params + search_params
+            c.execute(f"SELECT COUNT(*) FROM players {where_sql}", all_params)
+            total = c.fetchone()[0]
+            c.execute(f"""
+                SELECT {select} FROM players {where_sql}
+                ORDER BY {sort} {'DESC' if descending else 'ASC'}, id
+                LIMIT ? OFFSET ?
+            """, all_params + [page_size, page * page_size])
+            return PlayerPage([dict(row) for row in c.fetchall()], total)
+
+        try:
+            return run(search_filters, search_params)
+        except sqlite3.OperationalError:
+            if not match:
+                raise
+            # No FTS5 in this SQLite build
+            like = [f"%{w}%" for w in search.split()]
+            return run(["name LIKE ?"] * len(like), like)
+    finally:
+        conn.close()
+
+def remove_player(player_id):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("DELETE FROM players WHERE id = ?", (player_id,))
+    c.execute("UPDATE auction_state SET current_player_id = NULL WHERE id = 1 AND current_player_id = ?", (player_id,))
+    _log_event(c, 'remove_player', player_id=player_id)
+    _bump_version(c)
     conn.commit()
+    invalidate_snapshot()
     conn.close()
 
-def set_current_player(name):
+def set_current_player(player_id):
     conn = get_connection()
     c = conn.cursor()
-    # Reset all current
-    c.execute("UPDATE players SET is_current = 0")
-    if name:
-        c.execute("UPDATE players SET is_current = 1 WHERE name = ?", (name,))
+    # None clears the floor, passing on whoever was up
+    if player_id is None:
+        c.execute("""
+            INSERT INTO events (ts, kind, player_id)
+            SELECT ?, 'pass', current_player_id FROM auction_state WHERE id = 1
+        """, (time.time(),))
+    else:
+        _log_event(c, 'lot', player_id)
+    c.execute(
+        f"UPDATE auction_state SET current_player_id = ?, current_round = NULL, {_START_CLOCK} WHERE id = 1",
+        (player_id, time.time() if player_id is not None else None),
+    )
+    _bump_version(c)
     conn.commit()
+    invalidate_snapshot()
     conn.close()
 
 def get_current_player():
     conn = get_connection()
     c = conn.cursor()
-    c.execute("SELECT * FROM players WHERE is_current = 1")
+    c.execute("""
+        SELECT p.* FROM auction_state s
+        JOIN players p ON p.id = s.current_player_id
+        WHERE s.id = 1
+    """)
     row = c.fetchone()
     conn.close()
     if row:
         return dict(row)
     return None
 
-def update_bid(player_name, team_name, amount):
+def update_bid(player_id, team_name, amount):
     conn = get_connection()
     c = conn.cursor()
     try:
         c.execute("""
             UPDATE players 
             SET current_bid = ?, holding_team = ? 
-            WHERE name = ?
-        """, (amount, team_name, player_name))
+            WHERE id = ?
+        """, (amount, team_name, player_id))
+        _log_event(c, 'bid', player_id, team_name, amount)
+        _bump_version(c)
         conn.commit()
+        invalidate_snapshot()
         return True
     except Exception:
         conn.rollback()
@@ -165,28 +1145,159 @@ def update_bid(player_name, team_name, amount):
     finally:
         conn.close()
 
-def sell_player(player_name, team_name, price):
+# --- Bidding Engine ---
+# place_bid() raises the bid on the current lot as one BEGIN IMMEDIATE
+# transaction: the lot, the expected bid and the team's purse and squad are
+# all checked against the committed state, so concurrent consoles can never
+# overwrite each other's bids. place_bids() does the same for a batch of
+# bids in arrival order, paying for one commit instead of one per bid.
+# The rules themselves are in check_bid(), which memory_backend shares.
+BidResult = namedtuple('BidResult', ['accepted', 'reason', 'current_bid', 'holding_team'])
+
+def check_bid(lot, team, now, player_id, team_name, increment, expected_bid=None, expected_team=None, prices=None):
+    # The bidding rules, shared by every backend. lot is the player on the
+    # floor (id, role, status, current_bid, holding_team, lot_deadline) or
+    # None; team is the bidder's standing (remaining, players, max_players
+    # and a count per role) or None; prices are slot_prices() for the pool.
+    # Returns the BidResult refusing the bid, or None if it may go on.
+    if lot is None or lot['id'] != player_id:
+        return BidResult(False, "Player is not on the auction floor", None, None)
+
+    current_bid = lot['current_bid'] or 0
+    holding_team = lot['holding_team']
+
+    def reject(reason):
+        return BidResult(False, reason, current_bid, holding_team)
+
+    if lot['status'] != 'Unsold':
+        return reject("Player is already sold")
+    if lot['lot_deadline'] is not None and now >= lot['lot_deadline']:
+        return reject("Bidding on this lot has closed")
+    if increment <= 0:
+        return reject("Increment must be positive")
+    if expected_bid is not None and (current_bid != expected_bid or holding_team != expected_team):
+        return reject("Bid has moved on, refresh and try again")
+    if holding_team == team_name:
+        return reject(f"{team_name} already holds the bid")
+    if team is None:
+        return reject(f"Unknown team {team_name}")
+
+    new_bid = current_bid + increment
+    if new_bid > team['remaining']:
+        return reject(f"{team_name} cannot afford {new_bid}")
+    if team['max_players'] and team['players'] >= team['max_players']:
+        return reject(f"{team_name} squad is full")
+    if prices is not None:
+        limit = squad_limits(team, prices, lot["role"])[1]
+        if new_bid > limit:
+            return reject(f"{team_name} can bid at most {limit} and still complete its squad")
+    return None
+
+def _bid(c, now, player_id, team_name, increment, expected_bid=None, expected_team=None):
+    # Checks and applies one bid on the caller's transaction. A rejected bid
+    # has written nothing, so the caller may carry on with the transaction.
+    c.execute("""
+        SELECT p.id, p.role, p.status, p.current_bid, p.holding_team, s.lot_deadline FROM auction_state s
+        JOIN players p ON p.id = s.current_player_id
+        WHERE s.id = 1
+    """)
+    lot = c.fetchone()
+    c.execute(_standings_select() + " WHERE s.team = ?", (team_name,))
+    team = c.fetchone()
+    refused = check_bid(lot, team, now, player_id, team_name, increment, expected_bid, expected_team, _slot_prices(c))
+    if refused:
+        return refused
+
+    new_bid = (lot['current_bid'] or 0) + increment
+    c.execute("UPDATE players SET current_bid = ?, holding_team = ? WHERE id = ?", (new_bid, team_name, player_id))
+    # Every bid keeps the lot open for at least bid_extension more seconds
+    c.execute("""
+        UPDATE auction_state SET lot_deadline = MAX(lot_deadline, ? + COALESCE(bid_extension, 0))
+        WHERE id = 1 AND lot_deadline IS NOT NULL
+    """, (now,))
+    _log_event(c, 'bid', player_id, team_name, new_bid)
+    _bump_version(c)
+    return BidResult(True, None, new_bid, team_name)
+
+def place_bid(player_id, team_name, increment, expected_bid=None, expected_team=None):
+    # expected_bid/expected_team are what the caller last saw; if they are
+    # given and the lot has moved on since, the bid is rejected.
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        result = _bid(c, time.time(), player_id, team_name, increment, expected_bid, expected_team)
+        if not result.accepted:
+            conn.rollback()
+            return result
+        conn.commit()
+        invalidate_snapshot()
+        return result
+    except Exception as e:
+        conn.rollback()
+        return BidResult(False, str(e), None, None)
+    finally:
+        conn.close()
+
+def place_bids(bids):
+    # Applies a batch of (player_id, team_name, increment, expected_bid,
+    # expected_team) tuples in order, in one transaction, and returns one
+    # BidResult each. Later bids see the earlier ones, exactly as if they
+    # had been placed one by one.
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        results = [_bid(c, now, *bid) for bid in bids]
+        conn.commit()
+        if any(r.accepted for r in results):
+            invalidate_snapshot()
+        return results
+    except Exception as e:
+        conn.rollback()
+        return [BidResult(False, str(e), None, None) for _ in bids]
+    finally:
+        conn.close()
+
+def _sell(c, player_id, team_name, price):
+    # Optimistic Locking: Only update if status is 'Unsold'
+    # NOTE: The lot pointer is left alone so the "Sold" screen can be shown
+    c.execute("""
+        UPDATE players 
+        SET status = 'Sold', sold_to = ?, price = ?
+        WHERE id = ? AND status = 'Unsold'
+    """, (team_name, price, player_id))
+    if c.rowcount == 0:
+        # Player was already sold or doesn't exist
+        return False
+
+    # 2. Update Team Spent
+    c.execute("UPDATE teams SET spent = spent + COALESCE(?, 0) WHERE name = ?", (price, team_name))
+    c.execute("UPDATE auction_state SET lot_deadline = NULL WHERE id = 1 AND current_player_id = ?", (player_id,))
+    _log_event(c, 'sale', player_id, team_name, price)
+    _bump_version(c)
+    return True
+
+def sell_player(player_id, team_name, price, expected_bid=None, expected_team=None):
+    # expected_bid/expected_team are the bid the caller last saw; if they are
+    # given and the lot has moved on since, nothing is sold.
     conn = get_connection()
     c = conn.cursor()
     
     try:
-        # Optimistic Locking: Only update if status is 'Unsold'
-        # NOTE: We keep is_current = 1 so the "Sold" screen can be shown
-        c.execute("""
-            UPDATE players 
-            SET status = 'Sold', sold_to = ?, price = ?, is_current = 1 
-            WHERE name = ? AND status = 'Unsold'
-        """, (team_name, price, player_name))
-        
-        if c.rowcount == 0:
-            # Player was already sold or doesn't exist
+        c.execute("BEGIN IMMEDIATE")
+        if expected_bid is not None:
+            c.execute("SELECT current_bid, holding_team FROM players WHERE id = ?", (player_id,))
+            row = c.fetchone()
+            if row is None or (row['current_bid'] or 0) != expected_bid or row['holding_team'] != expected_team:
+                conn.rollback()
+                return False
+        if not _sell(c, player_id, team_name, price):
             conn.rollback()
             return False
-        
-        # 2. Update Team Spent
-        c.execute("UPDATE teams SET spent = spent + ? WHERE name = ?", (price, team_name))
-        
         conn.commit()
+        invalidate_snapshot()
         return True
     except Exception as e:
         print(e)
@@ -198,47 +1309,616 @@ def sell_player(player_name, team_name, price):
 def dismiss_current_player():
     conn = get_connection()
     c = conn.cursor()
-    c.execute("UPDATE players SET is_current = 0 WHERE is_current = 1")
+    c.execute("""
+        INSERT INTO events (ts, kind, player_id)
+        SELECT ?, 'dismiss', current_player_id FROM auction_state WHERE id = 1
+    """, (time.time(),))
+    c.execute("UPDATE auction_state SET current_player_id = NULL, lot_deadline = NULL WHERE id = 1")
+    _bump_version(c)
     conn.commit()
+    invalidate_snapshot()
     conn.close()
 
 
-def unsell_player(player_name):
+def unsell_player(player_id):
     conn = get_connection()
     c = conn.cursor()
     
-    # Get player details first to know price and team
-    c.execute("SELECT sold_to, price FROM players WHERE name = ?", (player_name,))
-    row = c.fetchone()
-    
-    if row:
+    try:
+        # Read the sale inside the write transaction, so two concurrent
+        # unsells cannot both refund it
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("SELECT sold_to, price FROM players WHERE id = ? AND status = 'Sold'", (player_id,))
+        row = c.fetchone()
+        if row is None:
+            conn.rollback()
+            return False
         team_name = row['sold_to']
         price = row['price']
         
-        try:
-            # 1. Reset Player
+        # 1. Reset Player
+        c.execute("""
+            UPDATE players 
+            SET status = 'Unsold', sold_to = NULL, price = NULL
+            WHERE id = ?
+        """, (player_id,))
+        c.execute("""
+            UPDATE auction_state SET current_player_id = NULL, lot_deadline = NULL
+            WHERE id = 1 AND current_player_id = ?
+        """, (player_id,))
+        
+        # 2. Refund Team
+        c.execute("UPDATE teams SET spent = spent - COALESCE(?, 0) WHERE name = ?", (price, team_name))
+        _log_event(c, 'unsell', player_id, team_name, price)
+        _bump_version(c)
+        
+        conn.commit()
+        invalidate_snapshot()
+        return True
+    except Exception:
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+# --- Lot Queue ---
+# Lots are called from a persistent queue instead of a random pick over the
+# pool. build_lot_queue() shuffles each set (player category) with a seed
+# derived from one recorded auction seed, so the order can be reproduced
+# and audited. Players passed in round one go to the back of the queue for
+# an accelerated round. Popping the next lot reads the head of the queue by
+# primary key, whatever the size of the pool.
+ACCELERATED_SET = 'Accelerated'
+UNASSIGNED_SET = 'Unassigned'
+
+def build_lot_queue(seed=None, set_order=None):
+    # set_order lists categories to call first; the rest follow in registration order
+    if seed is None:
+        seed = random.SystemRandom().randrange(1, 2 ** 31)
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("SELECT id, category FROM players WHERE status = 'Unsold' ORDER BY id")
+        sets = {}
+        for row in c.fetchall():
+            sets.setdefault(row['category'] or UNASSIGNED_SET, []).append(row['id'])
+
+        order = [name for name in (set_order or []) if name in sets]
+        order += [name for name in sets if name not in order]
+
+        queue = []
+        for set_name in order:
+            player_ids = sets[set_name]
+            random.Random(f"{seed}:{set_name}").shuffle(player_ids)
+            queue.extend((player_id, set_name) for player_id in player_ids)
+
+        c.execute("DELETE FROM lot_queue")
+        c.executemany("INSERT INTO lot_queue (player_id, set_name, round) VALUES (?, ?, 1)", queue)
+        c.execute("UPDATE auction_state SET queue_seed = ? WHERE id = 1", (seed,))
+        _log_event(c, 'queue', amount=seed)
+        _bump_version(c)
+        conn.commit()
+        invalidate_snapshot()
+        return seed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def next_lot():
+    # Pops the head of the queue onto the floor; returns the player or None if the queue is empty
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        while True:
             c.execute("""
-                UPDATE players 
-                SET status = 'Unsold', sold_to = NULL, price = NULL, is_current = 0
-                WHERE name = ?
-            """, (player_name,))
-            
-            # 2. Refund Team
-            c.execute("UPDATE teams SET spent = spent - ? WHERE name = ?", (price, team_name))
-            
-            conn.commit()
-            return True
-        except Exception:
+                SELECT q.position, q.player_id, q.round, p.status FROM lot_queue q
+                LEFT JOIN players p ON p.id = q.player_id
+                ORDER BY q.position LIMIT 1
+            """)
+            head = c.fetchone()
+            if head is None:
+                conn.rollback()
+                return None
+            c.execute("DELETE FROM lot_queue WHERE position = ?", (head['position'],))
+            # Skip players removed or sold since the queue was built
+            if head['status'] == 'Unsold':
+                break
+
+        c.execute(
+            f"UPDATE auction_state SET current_player_id = ?, current_round = ?, {_START_CLOCK} WHERE id = 1",
+            (head['player_id'], head['round'], time.time()),
+        )
+        _log_event(c, 'lot', head['player_id'], amount=head['round'])
+        _bump_version(c)
+        c.execute("SELECT * FROM players WHERE id = ?", (head['player_id'],))
+        player = dict(c.fetchone())
+        conn.commit()
+        invalidate_snapshot()
+        return player
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def _pass(c, player_id, status, current_round):
+    requeued = (status == 'Unsold' and (current_round or 1) == 1)
+    if requeued:
+        c.execute("""
+            INSERT INTO lot_queue (player_id, set_name, round)
+            SELECT ?, ?, 2 WHERE NOT EXISTS (SELECT 1 FROM lot_queue WHERE player_id = ?)
+        """, (player_id, ACCELERATED_SET, player_id))
+    c.execute("UPDATE auction_state SET current_player_id = NULL, current_round = NULL, lot_deadline = NULL WHERE id = 1")
+    _log_event(c, 'pass', player_id, amount=2 if requeued else None)
+    _bump_version(c)
+
+def pass_current_player():
+    # Clears the floor; a first-round pass is re-queued for the accelerated round
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("""
+            SELECT s.current_player_id, s.current_round, p.status FROM auction_state s
+            LEFT JOIN players p ON p.id = s.current_player_id
+            WHERE s.id = 1
+        """)
+        state = c.fetchone()
+        if state['current_player_id'] is None:
             conn.rollback()
             return False
-    
+        _pass(c, state['current_player_id'], state['status'], state['current_round'])
+        conn.commit()
+        invalidate_snapshot()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def get_lot_queue_summary():
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT queue_seed FROM auction_state WHERE id = 1")
+    seed = c.fetchone()['queue_seed']
+    c.execute("""
+        SELECT set_name, round, COUNT(*) AS lots, MIN(position) AS first_position FROM lot_queue
+        GROUP BY set_name, round
+        ORDER BY first_position
+    """)
+    sets = [dict(row) for row in c.fetchall()]
     conn.close()
-    return False
+    return {'seed': seed, 'remaining': sum(s['lots'] for s in sets), 'sets': sets}
+
+# --- Lot Timer ---
+# With lot_seconds set, every lot gets a deadline in auction_state when it
+# comes up, and each accepted bid pushes it to at least bid_extension
+# seconds away. expire_lot() closes a lot whose deadline has passed: it is
+# sold to the holding team, or passed if nobody bid. The check and the
+# sale happen in one BEGIN IMMEDIATE transaction that also clears the
+# deadline, so however many processes run the scheduler, a lot is closed
+# exactly once.
+_START_CLOCK = "lot_deadline = CASE WHEN lot_seconds > 0 THEN ? + lot_seconds END"
+
+def set_lot_timer(lot_seconds, bid_extension=0):
+    # lot_seconds of 0 or None turns the timer off; applies from the next lot
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE auction_state SET lot_seconds = ?, bid_extension = ? WHERE id = 1",
+        (lot_seconds or None, bid_extension or 0),
+    )
+    if not lot_seconds:
+        c.execute("UPDATE auction_state SET lot_deadline = NULL WHERE id = 1")
+    _bump_version(c)
+    conn.commit()
+    invalidate_snapshot()
+    conn.close()
+
+def get_lot_timer():
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT lot_seconds, bid_extension, lot_deadline FROM auction_state WHERE id = 1")
+    row = dict(c.fetchone())
+    conn.close()
+    return row
+
+def expire_lot(now=None):
+    # Returns 'sold' or 'passed' if this call closed the lot, else None
+    now = time.time() if now is None else now
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        # Cheap unlocked check first; the scheduler calls this several times a second
+        c.execute("SELECT lot_deadline FROM auction_state WHERE id = 1")
+        deadline = c.fetchone()['lot_deadline']
+        if deadline is None or now < deadline:
+            return None
+
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("""
+            SELECT s.current_player_id, s.current_round, s.lot_deadline, p.status, p.current_bid, p.holding_team
+            FROM auction_state s
+            LEFT JOIN players p ON p.id = s.current_player_id
+            WHERE s.id = 1
+        """)
+        lot = c.fetchone()
+        if lot['lot_deadline'] is None or now < lot['lot_deadline']:
+            # Another scheduler closed it, or a bid landed in the meantime
+            conn.rollback()
+            return None
+
+        if lot['status'] != 'Unsold':
+            c.execute("UPDATE auction_state SET lot_deadline = NULL WHERE id = 1")
+            outcome = None
+        elif lot['holding_team'] and _sell(c, lot['current_player_id'], lot['holding_team'], lot['current_bid']):
+            outcome = 'sold'
+        else:
+            _pass(c, lot['current_player_id'], lot['status'], lot['current_round'])
+            outcome = 'passed'
+        conn.commit()
+        invalidate_snapshot()
+        return outcome
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# --- Bulk Import ---
+# Files are parsed row by row and fed straight into one executemany
+# transaction. Bad rows are reported back instead of aborting the batch.
+ImportReport = namedtuple('ImportReport', ['inserted', 'rejected'])
+
+_NOT_UTF8 = re.compile('[\udc80-\udcff]')
+
+def _read_records(fileobj, fmt):
+    # Yields (row number, dict) with lower_snake_case keys, or (row number,
+    # reason) if the row can't be read. Bytes that aren't UTF-8 are kept as
+    # surrogate escapes so only the rows holding them are rejected.
+    if isinstance(fileobj, (bytes, str)):
+        fileobj = io.BytesIO(fileobj) if isinstance(fileobj, bytes) else io.StringIO(fileobj)
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', errors='surrogateescape')
+
+    def normalise(record):
+        if not isinstance(record, dict):
+            return "Could not parse row"
+        record = {str(k).strip().lower().replace(' ', '_'): v for k, v in record.items() if k is not None}
+        if any(isinstance(v, str) and _NOT_UTF8.search(v) for v in itertools.chain(record, record.values())):
+            return "Row is not UTF-8 text"
+        return record
+
+    if fmt == 'csv':
+        reader = csv.DictReader(fileobj)
+        for n in itertools.count(2):
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # e.g. a field over csv.field_size_limit(); the reader
+                # carries on from the next line
+                yield n, f"Could not parse row: {e}"
+                continue
+            yield n, normalise(record)
+        return
+
+    lines = iter(fileobj)
+    for first_line in lines:
+        if first_line.strip():
+            break
+    else:
+        return
+
+    if first_line.lstrip().startswith('['):
+        # A JSON array has to be read whole; JSON Lines below streams
+        try:
+            records = json.loads(first_line + fileobj.read())
+        except ValueError:
+            yield 1, "Could not parse file"
+            return
+        if not isinstance(records, list):
+            yield 1, "Could not parse file"
+            return
+        for n, record in enumerate(records, start=1):
+            yield n, normalise(record)
+        return
+
+    for n, line in enumerate(itertools.chain([first_line], lines), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield n, "Could not parse row"
+            continue
+        yield n, normalise(record)
+
+SQLITE_INT_MAX = 2 ** 63 - 1
+
+def _optional_int(value, field):
+    if value is None or str(value).strip() == '':
+        return None
+    if isinstance(value, bool):
+        # JSON true/false would otherwise pass as 1/0
+        raise ValueError(f"{field} must be a number")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        # Whole numbers written as floats ("2.0", 2.0) are fine; fractions
+        # are rejected rather than cut off
+        try:
+            as_float = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be a number")
+        if not as_float.is_integer():
+            raise ValueError(f"{field} must be a whole number")
+        number = int(as_float)
+    if number < 0:
+        raise ValueError(f"{field} cannot be negative")
+    if number > SQLITE_INT_MAX:
+        raise ValueError(f"{field} is too large")
+    return number
+
+def _existing_names(c, table):
+    c.execute(f"SELECT name FROM {table}")
+    return {row['name'].strip().lower() for row in c.fetchall() if row['name']}
+
+def _validate_player(record, seen):
+    name = str(record.get('name') or '').strip()
+    if not name:
+        raise ValueError("Missing name")
+    if name.lower() in seen:
+        raise ValueError(f"Duplicate name {name}")
+    role = str(record.get('role') or '').strip()
+    matches = [r for r in ROLES if r.lower() == role.lower()]
+    if not matches:
+        raise ValueError(f"Unknown role {role!r}")
+    base_price = _optional_int(record.get('base_price'), 'base_price')
+    category = str(record.get('category') or '').strip() or None
+    seen.add(name.lower())
+    return name, matches[0], base_price, category
+
+def _validate_team(record, seen):
+    name = str(record.get('name') or '').strip()
+    if not name:
+        raise ValueError("Missing name")
+    if name.lower() in seen:
+        raise ValueError(f"Duplicate name {name}")
+    budget = _optional_int(record.get('budget'), 'budget')
+    if not budget:
+        raise ValueError("budget must be a positive number")
+    max_players = _optional_int(record.get('max_players'), 'max_players') or None
+    seen.add(name.lower())
+    return name, budget, max_players
+
+def _bulk_insert(fileobj, fmt, table, sql, validate, event_kind):
+    conn = get_connection()
+    c = conn.cursor()
+    rejected = []
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        seen = _existing_names(c, table)
+
+        def rows():
+            for n, record in _read_records(fileobj, fmt):
+                if isinstance(record, str):
+                    rejected.append((n, record))
+                    continue
+                try:
+                    yield validate(record, seen)
+                except ValueError as e:
+                    rejected.append((n, str(e)))
+
+        c.executemany(sql, rows())
+        inserted = c.rowcount
+        if inserted:
+            _log_event(c, event_kind, amount=inserted)
+            _bump_version(c)
+        conn.commit()
+        invalidate_snapshot()
+        return ImportReport(inserted, rejected)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def import_players(fileobj, fmt='csv'):
+    # Columns: name, role, base_price (optional), category (optional)
+    return _bulk_insert(
+        fileobj, fmt, 'players',
+        "INSERT INTO players (name, role, base_price, category) VALUES (?, ?, ?, ?)",
+        _validate_player, 'import_players',
+    )
+
+def import_teams(fileobj, fmt='csv'):
+    # Columns: name, budget, max_players (optional)
+    return _bulk_insert(
+        fileobj, fmt, 'teams',
+        "INSERT INTO teams (name, budget, max_players) VALUES (?, ?, ?)",
+        _validate_team, 'import_teams',
+    )
 
 def reset_auction():
     conn = get_connection()
     c = conn.cursor()
     c.execute("DELETE FROM players")
     c.execute("DELETE FROM teams")
+    c.execute("DELETE FROM lot_queue")
+    c.execute("""
+        UPDATE auction_state SET current_player_id = NULL, current_round = NULL, queue_seed = NULL, lot_deadline = NULL
+        WHERE id = 1
+    """)
+    _log_event(c, 'reset')
+    _bump_version(c)
     conn.commit()
+    invalidate_snapshot()
     conn.close()
+
+# --- Export ---
+# Exports stream from a cursor: rows are fetched EXPORT_CHUNK at a time and
+# written out before the next chunk is read, so memory stays flat however
+# many rows or seasons go into the file. Every row starts with the auction
+# it came from, so several auctions can be exported as one archive.
+EXPORT_CHUNK = 5000
+EXPORT_FORMATS = ('csv', 'parquet', 'jsonl')
+ExportReport = namedtuple('ExportReport', ['rows', 'format'])
+
+# name -> (columns, query); the query selects exactly those columns
+EXPORT_TABLES = {
+    'players': (PLAYER_COLUMNS, f"SELECT {', '.join(PLAYER_COLUMNS)} FROM players ORDER BY id"),
+    'teams': (
+        ('name', 'budget', 'spent', 'remaining', 'players', 'max_players'),
+        """SELECT s.team, s.budget, s.spent, s.remaining, s.players, s.max_players
+           FROM team_summary s JOIN teams t ON t.name = s.team ORDER BY t.rowid""",
+    ),
+    'bids': (
+        ('seq', 'ts', 'kind', 'player_id', 'player', 'role', 'team', 'amount'),
+        """SELECT e.seq, e.ts, e.kind, e.player_id, p.name, p.role, e.team, e.amount
+           FROM events e LEFT JOIN players p ON p.id = e.player_id
+           WHERE e.kind IN ('bid', 'sale', 'unsell', 'pass') ORDER BY e.seq""",
+    ),
+    # One row per sold player: what they went for against their base price
+    'sales': (
+        ('player_id', 'name', 'role', 'category', 'team', 'base_price', 'price', 'premium', 'bids'),
+        """SELECT p.id, p.name, p.role, p.category, p.sold_to, p.base_price, p.price,
+                  p.price - COALESCE(p.base_price, 0), COALESCE(b.bids, 0)
+           FROM players p
+           LEFT JOIN (SELECT player_id, COUNT(*) AS bids FROM events WHERE kind = 'bid' GROUP BY player_id) b
+             ON b.player_id = p.id
+           WHERE p.status = 'Sold' ORDER BY p.id""",
+    ),
+}
+EXPORT_FLOAT_COLUMNS = {'ts'}
+EXPORT_TEXT_COLUMNS = {
+    'auction', 'name', 'role', 'status', 'sold_to', 'holding_team', 'category', 'kind', 'player', 'team',
+}
+
+# Small aggregates, grouped in SQL rather than by loading everything into pandas
+EXPORT_SUMMARIES = {
+    'price_by_role': """
+        SELECT role, COUNT(*) AS sold, SUM(price) AS total, CAST(ROUND(AVG(price)) AS INTEGER) AS average,
+               MIN(price) AS lowest, MAX(price) AS highest,
+               CAST(ROUND(AVG(price - COALESCE(base_price, 0))) AS INTEGER) AS premium
+        FROM players WHERE status = 'Sold' GROUP BY role ORDER BY total DESC
+    """,
+    'spend_by_team': """
+        SELECT s.team, s.players, s.spent, s.remaining, CAST(ROUND(AVG(p.price)) AS INTEGER) AS average,
+               MAX(p.price) AS highest
+        FROM team_summary s LEFT JOIN players p ON p.sold_to = s.team AND p.status = 'Sold'
+        GROUP BY s.team ORDER BY s.spent DESC
+    """,
+}
+
+def _auction_connection(auction_id):
+    # Opens an auction's database without selecting it for this thread
+    return get_connection(copy_context().run(use_auction, auction_id))
+
+def _pyarrow():
+    # pyarrow is optional; without it Parquet exports fall back to JSON Lines
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+def available_export_formats():
+    return tuple(fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or _pyarrow() is not None)
+
+def export_columns(table):
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export table {table!r}")
+    return ('auction',) + tuple(EXPORT_TABLES[table][0])
+
+def iter_export(table, auctions=None, chunk_size=EXPORT_CHUNK):
+    # Yields lists of up to chunk_size row tuples, auction id first; with no
+    # auctions given, exports the selected one
+    export_columns(table)
+    sql = EXPORT_TABLES[table][1]
+    for auction in auctions or [current_auction()]:
+        conn = _auction_connection(auction)
+        c = conn.cursor()
+        try:
+            # One read transaction per auction, so its rows are consistent
+            c.execute("BEGIN DEFERRED")
+            c.execute(sql)
+            while True:
+                rows = c.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [(auction, *row) for row in rows]
+            conn.commit()
+        finally:
+            conn.close()
+
+def _write_text_export(out, columns, chunks, fmt):
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    rows = 0
+    if fmt == 'csv':
+        writer.writerow(columns)
+    for chunk in chunks:
+        if fmt == 'csv':
+            writer.writerows(chunk)
+        else:
+            text.write(''.join(json.dumps(dict(zip(columns, row))) + "\n" for row in chunk))
+        rows += len(chunk)
+    text.flush()
+    text.detach()  # leave out open for the caller
+    return rows
+
+def _write_parquet_export(out, columns, chunks):
+    pa = _pyarrow()
+    schema = pa.schema([
+        (col, pa.float64() if col in EXPORT_FLOAT_COLUMNS else pa.string() if col in EXPORT_TEXT_COLUMNS else pa.int64())
+        for col in columns
+    ])
+    rows = 0
+    # Each chunk becomes one row group
+    with pa.parquet.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)], schema=schema,
+            ))
+            rows += len(chunk)
+    return rows
+
+def write_export(table, out, fmt='csv', auctions=None, chunk_size=EXPORT_CHUNK):
+    # Streams one table into the binary file object out
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    if fmt == 'parquet' and _pyarrow() is None:
+        fmt = 'jsonl'
+    columns = export_columns(table)
+    chunks = iter_export(table, auctions, chunk_size)
+    if fmt == 'parquet':
+        return ExportReport(_write_parquet_export(out, columns, chunks), fmt)
+    return ExportReport(_write_text_export(out, columns, chunks, fmt), fmt)
+
+def export_bytes(table, fmt='csv', auctions=None):
+    # The whole export as bytes, for st.download_button, which needs it in
+    # one piece: memory use grows with the export. Use write_export() with
+    # a file to stay at a constant size.
+    out = io.BytesIO()
+    write_export(table, out, fmt, auctions)
+    return out.getvalue()
+
+def export_summary(auctions=None):
+    # {report name: [row dict, ...]}, one block of rows per auction
+    summary = {name: [] for name in EXPORT_SUMMARIES}
+    for auction in auctions or [current_auction()]:
+        conn = _auction_connection(auction)
+        c = conn.cursor()
+        for name, sql in EXPORT_SUMMARIES.items():
+            c.execute(sql)
+            summary[name].extend({'auction': auction, **dict(row)} for row in c.fetchall())
+        conn.close()
+    return summary
@@ -0,0 +1,206 @@
+"""Opt-in instrumentation for db.py.
+
+Set AUCTION_DIAGNOSTICS=1 to wrap every public db.py function and count
+calls, wall time, rows returned and connections opened, per script run,
+per session and for the whole process. With the variable unset nothing is
+wrapped, so there is no overhead.
+
+Set AUCTION_DIAGNOSTICS_LOG=<path> as well to append one JSON line per
+finished script run.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = os.environ.get('AUCTION_DIAGNOSTICS') == '1'
+LOG_FILE = os.environ.get('AUCTION_DIAGNOSTICS_LOG')
+RUNS_KEPT = 20
+
+_lock = threading.Lock()
+_local = threading.local()
+_process = {'ops': {}, 'connections': 0, 'runs': 0}
+_sessions = {}
+
+
+class RunStats:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.started = time.time()
+        self.start_counter = time.perf_counter()
+        self.wall_seconds = None
+        self.ops = {}
+        self.connections = 0
+        self.db_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'session': self.session_id,
+            'started': self.started,
+            'wall_seconds': None if self.wall_seconds is None else round(self.wall_seconds, 6),
+            'db_seconds': round(self.db_seconds, 6),
+            'connections': self.connections,
+            'ops': self.ops,
+        }
+
+
+def _add(ops, name, seconds, rows):
+    op = ops.get(name)
+    if op is None:
+        op = ops[name] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0}
+    op['calls'] += 1
+    op['seconds'] += seconds
+    op['max_seconds'] = max(op['max_seconds'], seconds)
+    op['rows'] += rows
+
+
+def _row_count(result):
+    if hasattr(result, 'rows'):
+        return len(result.rows)
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return 1
+    return 0
+
+
+def _record(name, seconds, rows, outermost):
+    run = getattr(_local, 'run', None)
+    with _lock:
+        _add(_process['ops'], name, seconds, rows)
+        if run is not None:
+            _add(run.ops, name, seconds, rows)
+            if outermost:
+                run.db_seconds += seconds
+            session = _sessions.get(run.session_id)
+            if session is not None:
+                _add(session['ops'], name, seconds, rows)
+
+
+def _wrap(name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        depth = getattr(_local, 'depth', 0)
+        _local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _local.depth = depth
+        _record(name, time.perf_counter() - start, _row_count(result), depth == 0)
+        return result
+    wrapper.__wrapped_by_diagnostics__ = True
+    return wrapper
+
+
+def _wrap_connect(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        run = getattr(_local, 'run', None)
+        with _lock:
+            _process['connections'] += 1
+            if run is not None:
+                run.connections += 1
+                session = _sessions.get(run.session_id)
+                if session is not None:
+                    session['connections'] += 1
+        return fn(*args, **kwargs)
+    wrapper.__wrapped_by_diagnostics__ = True
+    return wrapper
+
+
+def instrument(module):
+    # Wraps module's public functions and its connection opener; functions
+    # marked __wrapped_by_diagnostics__ by an earlier rerun are skipped
+    for name, fn in list(vars(module).items()):
+        if not inspect.isfunction(fn) or fn.__module__ != module.__name__:
+            continue
+        if getattr(fn, '__wrapped_by_diagnostics__', False):
+            continue
+        if name == '_open_connection':
+            setattr(module, name, _wrap_connect(fn))
+        elif not name.startswith('_'):
+            setattr(module, name, _wrap(name, fn))
+
+
+def begin_run(session_id):
+    # Closes the session's previous run (Streamlit may have run it on
+    # another thread) and starts counting a new one on this thread
+    if not ENABLED:
+        return
+    run = RunStats(session_id)
+    with _lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            session = _sessions[session_id] = {
+                'ops': {}, 'connections': 0, 'runs': deque(maxlen=RUNS_KEPT), 'current': None,
+            }
+        previous = session['current']
+        session['current'] = run
+        _process['runs'] += 1
+    _local.run = run
+    if previous is not None:
+        _finish(previous)
+
+
+def mark_rendered():
+    # Call once the page is drawn; wall time minus db time is rendering and pandas
+    run = getattr(_local, 'run', None)
+    if run is not None and run.wall_seconds is None:
+        run.wall_seconds = time.perf_counter() - run.start_counter
+
+
+def _finish(run):
+    record = run.as_dict()
+    with _lock:
+        session = _sessions.get(run.session_id)
+        if session is not None:
+            session['runs'].append(record)
+    if LOG_FILE:
+        with open(LOG_FILE, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def current_run():
+    run = getattr(_local, 'run', None)
+    return run.as_dict() if run else None
+
+
+def session_stats(session_id):
+    with _lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            return None
+        return {'ops': dict(session['ops']), 'connections': session['connections'], 'runs': list(session['runs'])}
+
+
+def process_stats():
+    with _lock:
+        return {
+            'ops': {name: dict(op) for name, op in _process['ops'].items()},
+            'connections': _process['connections'],
+            'runs': _process['runs'],
+            'sessions': len(_sessions),
+        }
+
+
+def prometheus_text():
+    stats = process_stats()
+    lines = [
+        "# TYPE auction_db_calls_total counter",
+        *[f'auction_db_calls_total{{op="{n}"}} {op["calls"]}' for n, op in sorted(stats['ops'].items())],
+        "# TYPE auction_db_seconds_total counter",
+        *[f'auction_db_seconds_total{{op="{n}"}} {op["seconds"]:.6f}' for n, op in sorted(stats['ops'].items())],
+        "# TYPE auction_db_rows_total counter",
+        *[f'auction_db_rows_total{{op="{n}"}} {op["rows"]}' for n, op in sorted(stats['ops'].items())],
+        "# TYPE auction_db_connections_opened_total counter",
+        f"auction_db_connections_opened_total {stats['connections']}",
+        "# TYPE auction_script_runs_total counter",
+        f"auction_script_runs_total {stats['runs']}",
+        "# TYPE auction_sessions gauge",
+        f"auction_sessions {stats['sessions']}",
+    ]
+    return "\n".join(lines) + "\n"
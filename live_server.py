@@ -0,0 +1,265 @@
+"""Live update gateway for big-screen viewers.
+
+A standalone asyncio server that watches the auction through db.py and
+pushes compact JSON diffs to every connected screen over Server-Sent
+Events. The database is polled once per interval by this one process, no
+matter how many screens are connected. Screens need only a browser; the
+page they load is served by this process.
+
+It also closes timed lots for the auction it shows, unless started with
+--no-scheduler or with AUCTION_BACKEND=memory.
+
+    python live_server.py --port 8502 --auction default
+
+Then open http://localhost:8502/ on each screen.
+"""
+import argparse
+import asyncio
+import json
+
+import db
+import memory_backend
+import scheduler
+
+POLL_INTERVAL = 0.05
+HEARTBEAT_INTERVAL = 15
+MAX_CLIENT_BUFFER = 256 * 1024  # bytes queued for a screen before it is dropped
+
+VIEWER_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Live Auction View</title>
+<style>
+  body { font-family: sans-serif; margin: 20px; }
+  .card { padding: 40px; border-radius: 15px; text-align: center; margin-bottom: 20px; }
+  .live { background: #e8f5e9; border: 3px solid #4CAF50; }
+  .sold { background: #fff3e0; border: 3px solid #ff9800; }
+  .idle { padding: 50px; }
+  table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }
+  th, td { border-bottom: 1px solid #ddd; padding: 6px; text-align: left; }
+</style>
+</head>
+<body>
+<h1>&#128064; Live Auction View</h1>
+<div id="lot"></div>
+<h2>Recent Sales</h2>
+<table><thead><tr><th>Name</th><th>Role</th><th>Sold To</th><th>Price</th></tr></thead><tbody id="recent"></tbody></table>
+<h2>Team Standings</h2>
+<table><thead><tr><th>Team</th><th>Budget</th><th>Spent</th><th>Remaining Purse</th></tr></thead><tbody id="teams"></tbody></table>
+<script>
+let state = {};
+
+function el(tag, text, style) {
+  const node = document.createElement(tag);
+  if (text !== undefined) node.textContent = text;
+  if (style) node.style.cssText = style;
+  return node;
+}
+
+function row(cells) {
+  const tr = document.createElement('tr');
+  cells.forEach(c => tr.appendChild(el('td', c)));
+  return tr;
+}
+
+function renderLot() {
+  const box = document.getElementById('lot');
+  box.replaceChildren();
+  const lot = state.lot;
+  if (!lot) {
+    box.className = 'card idle';
+    box.appendChild(el('h2', '\\u23f3 Waiting for the next player...'));
+  } else if (lot.status === 'Sold') {
+    box.className = 'card sold';
+    box.appendChild(el('h1', '\\ud83c\\udf89 SOLD!', 'color:#e65100;font-size:4em'));
+    box.appendChild(el('h2', lot.name));
+    box.appendChild(el('h3', 'Sold to ' + lot.sold_to, 'color:#555'));
+    box.appendChild(el('h1', '\\u20b9 ' + lot.price, 'color:#2e7d32;font-size:3.5em'));
+  } else {
+    box.className = 'card live';
+    box.appendChild(el('h1', lot.name, 'color:#2e7d32;font-size:3em'));
+    box.appendChild(el('h3', lot.role, 'color:#555'));
+    box.appendChild(el('h2', 'Current Bid: \\u20b9 ' + lot.bid, 'color:#d32f2f;font-size:2.5em'));
+    box.appendChild(el('h3', 'Holding: ' + (lot.team || 'Waiting for bids...'), 'color:#1976d2'));
+    if (lot.closes) box.appendChild(el('h2', '', 'color:#e65100')).id = 'clock';
+    tick();
+  }
+}
+
+function tick() {
+  // Counts down locally to the deadline the server sent
+  const clock = document.getElementById('clock');
+  if (!clock || !state.lot || !state.lot.closes) return;
+  const left = Math.ceil(state.lot.closes - Date.now() / 1000);
+  clock.textContent = left > 0 ? '\u23f1 Closes in ' + left + 's' : '\u23f1 Closing...';
+}
+setInterval(tick, 250);
+
+function renderTables() {
+  document.getElementById('recent').replaceChildren(...(state.recent || []).map(row));
+  const teams = Object.entries(state.teams || {});
+  document.getElementById('teams').replaceChildren(
+    ...teams.map(([name, [budget, spent]]) => row([name, budget, spent, budget - spent])));
+}
+
+function apply(diff) {
+  Object.assign(state, diff);
+  if ('lot' in diff) renderLot();
+  if ('recent' in diff || 'teams' in diff) renderTables();
+}
+
+const source = new EventSource('/events');
+source.addEventListener('state', e => { state = {}; apply(JSON.parse(e.data)); });
+source.addEventListener('diff', e => apply(JSON.parse(e.data)));
+</script>
+</body>
+</html>
+"""
+
+
+def public_state(snap):
+    # Only what the big screen shows, in the smallest shape that works
+    lot = snap.current_player
+    return {
+        'version': snap.version,
+        'lot': None if lot is None else {
+            'id': lot['id'],
+            'name': lot['name'],
+            'role': lot['role'],
+            'status': lot['status'],
+            'bid': lot['current_bid'] or 0,
+            'team': lot['holding_team'],
+            'sold_to': lot['sold_to'],
+            'price': lot['price'],
+            'closes': snap.lot_deadline,
+        },
+        'teams': {t['name']: [t['budget'], t['spent']] for t in snap.teams},
+        'recent': [[p['name'], p['role'], p['sold_to'], p['price']] for p in snap.recent_sales],
+    }
+
+
+def diff_state(old, new):
+    return {k: v for k, v in new.items() if old.get(k) != v}
+
+
+def sse_message(event, payload):
+    data = json.dumps(payload, separators=(',', ':'))
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+class Broadcaster:
+    def __init__(self):
+        self.clients = set()
+        self.state = None
+
+    def broadcast(self, message):
+        for writer in list(self.clients):
+            # A screen that stops reading is dropped rather than buffered forever
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.clients.discard(writer)
+                writer.close()
+            else:
+                writer.write(message)
+
+    async def watch(self):
+        while True:
+            try:
+                snap = await asyncio.to_thread(db.get_snapshot)
+            except Exception as e:
+                print(e)
+                await asyncio.sleep(1)
+                continue
+
+            if self.state is None or snap.version != self.state['version']:
+                new_state = public_state(snap)
+                if self.state is None:
+                    self.broadcast(sse_message('state', new_state))
+                else:
+                    self.broadcast(sse_message('diff', diff_state(self.state, new_state)))
+                self.state = new_state
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.broadcast(b": ping\n\n")
+
+    async def handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        parts = request.split(b"\r\n", 1)[0].decode('latin-1').split()
+        path = parts[1].split('?', 1)[0] if len(parts) > 1 else '/'
+
+        if path == '/events':
+            await self.stream(reader, writer)
+        elif path == '/state':
+            self.respond(writer, '200 OK', 'application/json', json.dumps(self.state).encode())
+        elif path == '/':
+            self.respond(writer, '200 OK', 'text/html; charset=utf-8', VIEWER_PAGE.encode())
+        else:
+            self.respond(writer, '404 Not Found', 'text/plain', b"Not Found")
+
+    def respond(self, writer, status, content_type, body):
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        writer.close()
+
+    async def stream(self, reader, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+        )
+        if self.state is not None:
+            writer.write(sse_message('state', self.state))
+        self.clients.add(writer)
+        try:
+            # Screens never send anything after the request; EOF means they left
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+
+async def serve(host, port):
+    broadcaster = Broadcaster()
+    server = await asyncio.start_server(broadcaster.handle, host, port, backlog=1024)
+    print(f"Live view on http://{host}:{port}/")
+    async with server:
+        await asyncio.gather(server.serve_forever(), broadcaster.watch(), broadcaster.heartbeat())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push live auction updates to big-screen viewers.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--db', default=db.DB_FILE, help="default auction database file")
+    parser.add_argument('--auction', default=db.DEFAULT_AUCTION, help="auction to show")
+    parser.add_argument(
+        '--no-scheduler', action='store_true',
+        help="leave closing timed lots to the app (implied by AUCTION_BACKEND=memory)",
+    )
+    args = parser.parse_args()
+
+    db.DB_FILE = args.db
+    # This process is the only reader here, so probe on every poll
+    db.SNAPSHOT_MAX_AGE = 0
+    db.use_auction(args.auction)
+    # With the memory backend the app's engine owns the auction; closing a
+    # lot here would write behind its back
+    if not (args.no_scheduler or memory_backend.ENABLED):
+        scheduler.start([args.auction])
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
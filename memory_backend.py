@@ -0,0 +1,577 @@
+"""In-memory auction engine with write-behind persistence to SQLite.
+
+Set AUCTION_BACKEND=memory to run the auction floor from memory. Bids,
+sales and lot changes are checked and applied to compact records under one
+lock. Each change is appended to a journal file next to the database and
+written to SQLite in batches, at most FLUSH_INTERVAL seconds later. Floor
+reads never touch SQLite. On restart the journal entries that SQLite has
+not seen yet are replayed, so a bid that was acknowledged survives a crash.
+
+install() swaps the floor functions in db.py for the in-memory ones, so
+callers keep using db.place_bid() and friends. Everything else (setup,
+imports, the lot queue, corrections) still runs against SQLite: pending
+changes are flushed first, and the engine reloads if SQLite moved on.
+Calling the next lot, changing the lot timer and unselling reload only
+the rows they touch, so the lot switch stays as cheap as on SQLite.
+
+While a process runs the engine it owns the auction, so only one process
+may write to an auction with this backend. Other processes may only read
+SQLite, and see changes within FLUSH_INTERVAL: run live_server.py with
+--no-scheduler (or the same AUCTION_BACKEND) so it does not close lots,
+and do not run paddle_server.py alongside.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+import db
+
+ENABLED = os.environ.get('AUCTION_BACKEND', 'sqlite') == 'memory'
+FLUSH_INTERVAL = float(os.environ.get('AUCTION_FLUSH_INTERVAL', '0.1'))
+JOURNAL_FSYNC = os.environ.get('AUCTION_JOURNAL_FSYNC') == '1'  # survive power loss, not just a crash
+
+# Served from memory
+FLOOR_FUNCTIONS = (
+    'get_snapshot', 'get_state_version', 'get_current_player', 'get_players', 'get_teams',
+    'get_team_summary', 'get_squad_summary', 'place_bid', 'place_bids', 'update_bid', 'sell_player',
+    'set_current_player', 'dismiss_current_player', 'pass_current_player', 'expire_lot',
+)
+# Write SQLite directly: pending changes are flushed first, then the engine reloads
+WRITERS = (
+    'add_team', 'add_player', 'remove_player', 'import_teams', 'import_players',
+    'build_lot_queue', 'check_team_summary', 'reset_auction', 'take_state_snapshot', 'restore',
+)
+# The same, but only the rows they touch are reloaded (see Engine.refresh)
+REFRESHING_WRITERS = {
+    'next_lot': lambda engine: engine.refresh(),
+    'set_lot_timer': lambda engine, *args, **kwargs: engine.refresh(),
+    'unsell_player': lambda engine, player_id: engine.refresh(player_id),
+}
+# Read SQLite directly: pending changes are flushed first
+READERS = (
+    'get_team_stats', 'get_team_squad', 'query_players', 'get_events_since', 'get_recent_sales',
+    'get_lot_queue_summary', 'get_lot_timer', 'list_state_snapshots', 'list_sales',
+    'iter_export', 'write_export', 'export_summary',
+)
+
+_lock = threading.Lock()
+_engines = {}
+
+
+class PlayerRecord:
+    __slots__ = db.PLAYER_COLUMNS
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def as_dict(self, columns=db.PLAYER_COLUMNS):
+        return {name: getattr(self, name) for name in columns}
+
+
+class TeamRecord:
+    __slots__ = ('name', 'budget', 'spent', 'max_players', 'players', 'roles')
+
+    def __init__(self, name, budget, spent, max_players):
+        self.name = name
+        self.budget = budget
+        self.spent = spent or 0
+        self.max_players = max_players
+        self.players = 0
+        self.roles = [0] * len(db.ROLES)
+
+    def as_dict(self, columns=db.TEAM_COLUMNS):
+        return {name: getattr(self, name) for name in columns}
+
+    def add(self, role, n=1):
+        self.players += n
+        if role in db.ROLES:
+            self.roles[db.ROLES.index(role)] += n
+
+    def standing(self):
+        remaining = self.budget - self.spent
+        full = self.max_players and self.players >= self.max_players
+        return {
+            'name': self.name, 'budget': self.budget, 'spent': self.spent, 'remaining': remaining,
+            'players': self.players, 'max_players': self.max_players,
+            'max_bid': 0 if full else max(remaining, 0),
+            **dict(zip(db.ROLES, self.roles)),
+        }
+
+
+# --- SQLite side of each journal entry ---
+def _write_bid(c, player_id, team_name, amount, deadline):
+    c.execute("UPDATE players SET current_bid = ?, holding_team = ? WHERE id = ?", (amount, team_name, player_id))
+    c.execute("UPDATE auction_state SET lot_deadline = ? WHERE id = 1", (deadline,))
+    db._log_event(c, 'bid', player_id, team_name, amount)
+    db._bump_version(c)
+
+def _write_sale(c, player_id, team_name, price):
+    db._sell(c, player_id, team_name, price)
+
+def _write_lot(c, player_id, current_round, deadline):
+    c.execute(
+        "UPDATE auction_state SET current_player_id = ?, current_round = ?, lot_deadline = ? WHERE id = 1",
+        (player_id, current_round, deadline),
+    )
+    db._log_event(c, 'lot', player_id, amount=current_round)
+    db._bump_version(c)
+
+def _write_clear(c, player_id):
+    c.execute("UPDATE auction_state SET current_player_id = NULL, current_round = NULL, lot_deadline = NULL WHERE id = 1")
+    db._log_event(c, 'pass', player_id)
+    db._bump_version(c)
+
+def _write_pass(c, player_id, status, current_round):
+    db._pass(c, player_id, status, current_round)
+
+def _write_dismiss(c, player_id):
+    c.execute("UPDATE auction_state SET current_player_id = NULL, lot_deadline = NULL WHERE id = 1")
+    db._log_event(c, 'dismiss', player_id)
+    db._bump_version(c)
+
+SQL_WRITERS = {
+    'bid': _write_bid, 'sale': _write_sale, 'lot': _write_lot,
+    'clear': _write_clear, 'pass': _write_pass, 'dismiss': _write_dismiss,
+}
+
+
+class Engine:
+    # Lock order: flush_lock before lock. Floor calls only take lock, so a
+    # batch being written to SQLite never holds up a bid.
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.journal_file = db_file + '.journal.jsonl'
+        self.lock = threading.RLock()
+        self.flush_lock = threading.Lock()
+        self.pending = []
+        self.load()
+        self.replay()
+        self.journal = open(self.journal_file, 'a')
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"write-behind {db_file}", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        conn = db.get_connection(self.db_file)
+        c = conn.cursor()
+        try:
+            c.execute("BEGIN DEFERRED")
+            c.execute("SELECT * FROM auction_state WHERE id = 1")
+            state = c.fetchone()
+            c.execute(f"SELECT {', '.join(db.PLAYER_COLUMNS)} FROM players ORDER BY id")
+            players = {row['id']: PlayerRecord(*row) for row in c.fetchall()}
+            c.execute(f"SELECT {', '.join(db.TEAM_COLUMNS)} FROM teams ORDER BY rowid")
+            teams = {row['name']: TeamRecord(*row) for row in c.fetchall()}
+            recent = [row['id'] for row in db._recent_sales(c, db.RECENT_SALES)]
+            conn.commit()
+        finally:
+            conn.close()
+
+        for p in players.values():
+            if p.status == 'Sold' and p.sold_to in teams:
+                teams[p.sold_to].add(p.role)
+        with self.lock:
+            self.players, self.teams, self.recent = players, teams, recent
+            self.set_state(state)
+            self.seq = state['journal_seq'] or 0
+            self.snapshot_base = None
+            self.prices = None
+            self.dirty = set()
+
+    def set_state(self, state):
+        # Caller holds self.lock
+        self.version = state['version']
+        self.current_player_id = state['current_player_id']
+        self.current_round = state['current_round']
+        self.lot_seconds = state['lot_seconds']
+        self.bid_extension = state['bid_extension']
+        self.lot_deadline = state['lot_deadline']
+        self.snapshot = None
+
+    def refresh(self, player_id=None):
+        # After a lot or timer change only auction_state moved; after an
+        # unsell also player_id, the team it left and the recent sales
+        conn = db.get_connection(self.db_file)
+        c = conn.cursor()
+        try:
+            c.execute("BEGIN DEFERRED")
+            c.execute("SELECT * FROM auction_state WHERE id = 1")
+            state = c.fetchone()
+            if player_id is not None:
+                c.execute(f"SELECT {', '.join(db.PLAYER_COLUMNS)} FROM players WHERE id = ?", (player_id,))
+                row = c.fetchone()
+                c.execute("SELECT name, spent FROM teams")
+                spent = dict(c.fetchall())
+                recent = [r['id'] for r in db._recent_sales(c, db.RECENT_SALES)]
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self.lock:
+            if player_id is not None:
+                old = self.players.get(player_id)
+                if old is not None and old.status == 'Sold' and old.sold_to in self.teams:
+                    self.teams[old.sold_to].add(old.role, -1)
+                for name, team in self.teams.items():
+                    team.spent = spent.get(name, team.spent) or 0
+                if row is not None:
+                    self.players[player_id] = PlayerRecord(*row)
+                    self.dirty.add(player_id)
+                self.recent = recent
+                self.prices = None
+            self.set_state(state)
+
+    def replay(self):
+        # Entries past journal_seq were acknowledged but never reached SQLite
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn last line from a crash; it was never acknowledged
+                if entry[0] <= self.seq:
+                    continue
+                self.seq = entry[0]
+                try:
+                    self.apply(entry[1], *entry[2:])
+                except KeyError:
+                    continue  # the player is gone from SQLite (reset or removed)
+                self.pending.append(entry)
+
+    # --- Changes ---
+    def record(self, op, *args):
+        # Caller holds self.lock
+        self.seq += 1
+        entry = [self.seq, op, *args]
+        self.journal.write(json.dumps(entry) + "\n")
+        self.journal.flush()
+        if JOURNAL_FSYNC:
+            os.fsync(self.journal.fileno())
+        self.apply(op, *args)
+        self.pending.append(entry)
+
+    def apply(self, op, *args):
+        if op == 'bid':
+            player_id, team_name, amount, deadline = args
+            player = self.players[player_id]
+            player.current_bid, player.holding_team = amount, team_name
+            self.lot_deadline = deadline
+            self.dirty.add(player_id)
+        elif op == 'sale':
+            player_id, team_name, price = args
+            player = self.players[player_id]
+            player.status, player.sold_to, player.price = 'Sold', team_name, price
+            team = self.teams.get(team_name)
+            if team is not None:
+                team.spent += price or 0
+                team.add(player.role)
+            self.prices = None
+            if self.current_player_id == player_id:
+                self.lot_deadline = None
+            self.recent = [player_id] + [pid for pid in self.recent if pid != player_id][:db.RECENT_SALES - 1]
+            self.dirty.add(player_id)
+        elif op == 'lot':
+            self.current_player_id, self.current_round, self.lot_deadline = args
+        elif op in ('clear', 'pass', 'dismiss'):
+            self.current_player_id = self.lot_deadline = None
+            if op != 'dismiss':
+                self.current_round = None
+        self.version += 1
+        self.snapshot = None
+
+    def slot_prices(self):
+        # Caller holds self.lock; only a sale or a reload changes the pool
+        if self.prices is None:
+            cheapest = {}
+            for p in self.players.values():
+                if p.status == 'Unsold':
+                    price = p.base_price or 0
+                    if p.role not in cheapest or price < cheapest[p.role]:
+                        cheapest[p.role] = price
+            self.prices = db.slot_prices(cheapest)
+        return self.prices
+
+    def start_clock(self, now):
+        return now + self.lot_seconds if self.lot_seconds else None
+
+    # --- Write-behind ---
+    def run(self):
+        while not self.stop.wait(FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception as e:
+                print(e)
+
+    def flush(self):
+        with self.flush_lock:
+            self._flush()
+
+    def _flush(self):
+        # Caller holds flush_lock
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if batch:
+            try:
+                self.write(batch)
+            except Exception:
+                with self.lock:
+                    self.pending[:0] = batch
+                raise
+        with self.lock:
+            if not self.pending and self.journal.tell():
+                self.journal.truncate(0)
+
+    def write(self, batch):
+        conn = db.get_connection(self.db_file)
+        c = conn.cursor()
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            for seq, op, *args in batch:
+                SQL_WRITERS[op](c, *args)
+            c.execute("UPDATE auction_state SET journal_seq = ? WHERE id = 1", (batch[-1][0],))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def sqlite_version(self):
+        conn = db.get_connection(self.db_file)
+        c = conn.cursor()
+        c.execute("SELECT version FROM auction_state WHERE id = 1")
+        version = c.fetchone()['version']
+        conn.close()
+        return version
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+        self.flush()
+        self.journal.close()
+
+    # --- Reads ---
+    def get_snapshot(self):
+        with self.lock:
+            if self.snapshot is not None:
+                return self.snapshot
+            base = self.snapshot_base
+            if base is None:
+                players = [p.as_dict() for p in self.players.values()]
+                index = {p['id']: i for i, p in enumerate(players)}
+            else:
+                # Only the players touched since the last snapshot are copied
+                players, index = list(base.players), base.player_index
+                for player_id in self.dirty:
+                    players[index[player_id]] = self.players[player_id].as_dict()
+            self.dirty.clear()
+            players = tuple(players)
+            current = players[index[self.current_player_id]] if self.current_player_id in index else None
+            # No event cursor: this snapshot is not built from the event log
+            self.snapshot = self.snapshot_base = db.AuctionSnapshot(
+                self.version, None, current, players,
+                tuple(t.as_dict() for t in self.teams.values()),
+                tuple(players[index[pid]] for pid in self.recent),
+                index, self.lot_deadline,
+                tuple(t.standing() for t in self.teams.values()),
+            )
+            return self.snapshot
+
+
+def _engine():
+    db_file = db._db_file()
+    engine = _engines.get(db_file)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(db_file)
+            if engine is None:
+                db.init_db()
+                engine = _engines[db_file] = Engine(db_file)
+    return engine
+
+
+def close_all():
+    with _lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.close()
+
+atexit.register(close_all)
+
+
+# --- Floor functions (same signatures as db.py) ---
+def get_snapshot():
+    return _engine().get_snapshot()
+
+def get_state_version():
+    return _engine().version
+
+def get_current_player():
+    engine = _engine()
+    with engine.lock:
+        player = engine.players.get(engine.current_player_id)
+        return player.as_dict() if player else None
+
+def get_players(columns=None, status=None):
+    db._select_list(columns, db.PLAYER_COLUMNS)
+    columns = columns or db.PLAYER_COLUMNS
+    engine = _engine()
+    with engine.lock:
+        return [p.as_dict(columns) for p in engine.players.values() if not status or p.status == status]
+
+def get_teams(columns=None):
+    db._select_list(columns, db.TEAM_COLUMNS)
+    engine = _engine()
+    with engine.lock:
+        return [t.as_dict(columns or db.TEAM_COLUMNS) for t in engine.teams.values()]
+
+def get_team_summary(team_name):
+    engine = _engine()
+    with engine.lock:
+        team = engine.teams.get(team_name)
+        return team.standing() if team else None
+
+def get_squad_summary():
+    engine = _engine()
+    with engine.lock:
+        return [t.standing() for t in engine.teams.values()]
+
+def place_bid(player_id, team_name, increment, expected_bid=None, expected_team=None):
+    engine = _engine()
+    now = time.time()
+    with engine.lock:
+        player = engine.players.get(engine.current_player_id)
+        team = engine.teams.get(team_name)
+        lot = None
+        if player is not None:
+            lot = dict(player.as_dict(('id', 'role', 'status', 'current_bid', 'holding_team')), lot_deadline=engine.lot_deadline)
+        standing = team.standing() if team is not None else None
+        refused = db.check_bid(
+            lot, standing, now, player_id, team_name, increment, expected_bid, expected_team, engine.slot_prices(),
+        )
+        if refused:
+            return refused
+
+        new_bid = (player.current_bid or 0) + increment
+        deadline = engine.lot_deadline
+        if deadline is not None:
+            deadline = max(deadline, now + (engine.bid_extension or 0))
+        engine.record('bid', player_id, team_name, new_bid, deadline)
+        return db.BidResult(True, None, new_bid, team_name)
+
+def place_bids(bids):
+    engine = _engine()
+    with engine.lock:
+        return [place_bid(*bid) for bid in bids]
+
+def update_bid(player_id, team_name, amount):
+    engine = _engine()
+    with engine.lock:
+        if player_id not in engine.players:
+            return False
+        engine.record('bid', player_id, team_name, amount, engine.lot_deadline)
+        return True
+
+def sell_player(player_id, team_name, price, expected_bid=None, expected_team=None):
+    engine = _engine()
+    with engine.lock:
+        player = engine.players.get(player_id)
+        if player is None or player.status != 'Unsold':
+            return False
+        if expected_bid is not None and ((player.current_bid or 0) != expected_bid or player.holding_team != expected_team):
+            return False
+        engine.record('sale', player_id, team_name, price)
+        return True
+
+def set_current_player(player_id):
+    engine = _engine()
+    with engine.lock:
+        if player_id is None:
+            engine.record('clear', engine.current_player_id)
+        else:
+            engine.record('lot', player_id, None, engine.start_clock(time.time()))
+
+def dismiss_current_player():
+    engine = _engine()
+    with engine.lock:
+        engine.record('dismiss', engine.current_player_id)
+
+def pass_current_player():
+    engine = _engine()
+    with engine.lock:
+        player = engine.players.get(engine.current_player_id)
+        if engine.current_player_id is None:
+            return False
+        engine.record('pass', engine.current_player_id, player.status if player else None, engine.current_round)
+        return True
+
+def expire_lot(now=None):
+    now = time.time() if now is None else now
+    engine = _engine()
+    with engine.lock:
+        if engine.lot_deadline is None or now < engine.lot_deadline:
+            return None
+        player = engine.players.get(engine.current_player_id)
+        if player is None or player.status != 'Unsold':
+            engine.lot_deadline = engine.snapshot = None
+            return None
+        if player.holding_team:
+            engine.record('sale', player.id, player.holding_team, player.current_bid)
+            return 'sold'
+        engine.record('pass', player.id, player.status, engine.current_round)
+        return 'passed'
+
+
+# --- Installing ---
+def _wrap_writer(fn, refresh=None):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        engine = _engine()
+        with engine.flush_lock:
+            with engine.lock:
+                engine._flush()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    if engine.sqlite_version() != engine.version:
+                        if refresh is None:
+                            engine.load()
+                        else:
+                            refresh(engine, *args, **kwargs)
+    wrapper.__memory_backend__ = True
+    return wrapper
+
+
+def _wrap_reader(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _engine().flush()
+        return fn(*args, **kwargs)
+    wrapper.__memory_backend__ = True
+    return wrapper
+
+
+def install():
+    # Points db's floor functions at the engine and wraps its SQLite writers
+    # and readers; a db function already marked __memory_backend__ is kept
+    for name in FLOOR_FUNCTIONS + WRITERS + tuple(REFRESHING_WRITERS) + READERS:
+        fn = getattr(db, name)
+        if getattr(fn, '__memory_backend__', False):
+            continue
+        if name in FLOOR_FUNCTIONS:
+            replacement = functools.wraps(fn)(globals()[name])
+            replacement.__memory_backend__ = True
+        elif name in WRITERS:
+            replacement = _wrap_writer(fn)
+        elif name in REFRESHING_WRITERS:
+            replacement = _wrap_writer(fn, REFRESHING_WRITERS[name])
+        else:
+            replacement = _wrap_reader(fn)
+        setattr(db, name, replacement)
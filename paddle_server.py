@@ -0,0 +1,323 @@
+"""Bid paddle API for team devices.
+
+A standalone asyncio JSON/HTTP service that runs next to auction_app.py.
+Each team's paddle (a phone, tablet or laptop) posts its raises here. The
+service stamps every raise with an arrival sequence number, answers
+retries of a raise it has already seen with the original answer, and
+feeds raises through a single writer that applies them strictly in arrival
+order with db.place_bids(), one transaction per batch. Each raise is
+acknowledged with its outcome and the lot as it stood right after it.
+Raises that arrive while a batch is being written form the next one (up
+to MAX_BATCH).
+
+A raise is only taken with its team's token, an HMAC of the team name
+under the server secret (AUCTION_PADDLE_SECRET, or a random one per run).
+The service prints a paddle link with the token for every team at
+startup; hand each team only its own link.
+
+    python paddle_server.py --port 8503
+
+    POST /bid    {"team": "Team A", "token": "<team token>", "player_id": 7,
+                  "increment": 100, "bid_id": "<unique per raise>",
+                  "expected_bid": 1200, "expected_team": "Team B"}
+    GET  /state  the lot on the floor and every team's purse
+    GET  /       a paddle page for a browser (/?team=...&token=...)
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import socket
+import time
+from urllib.parse import urlencode
+from collections import OrderedDict
+
+import analytics
+import db
+
+MAX_BATCH = 64  # raises applied per transaction
+MAX_BODY = 4096
+DEDUPE_KEPT = 10000  # answered raises remembered for retries
+REQUEST_TIMEOUT = 30
+
+PADDLE_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Bid Paddle</title>
+<style>
+  body { font-family: sans-serif; margin: 20px; text-align: center; }
+  select, button { font-size: 1.5em; margin: 6px; padding: 10px 20px; }
+  #lot { font-size: 1.5em; margin: 20px 0; }
+  #ack { color: #555; min-height: 1.5em; }
+</style>
+</head>
+<body>
+<h1>&#128400; Bid Paddle</h1>
+<h2 id="team"></h2>
+<div id="lot">Waiting for the next player...</div>
+<div>
+  <button onclick="raise(100)">+100</button>
+  <button onclick="raise(200)">+200</button>
+  <button onclick="raise(500)">+500</button>
+</div>
+<div id="ack"></div>
+<script>
+let state = null;
+// The link handed to the team carries its name and token; keep them for reloads
+const params = new URLSearchParams(location.search);
+if (params.get('team') && params.get('token')) {
+  localStorage.setItem('paddle_team', params.get('team'));
+  localStorage.setItem('paddle_token', params.get('token'));
+}
+const myTeam = localStorage.getItem('paddle_team');
+const myToken = localStorage.getItem('paddle_token');
+document.getElementById('team').textContent = myTeam || 'Open the paddle link for your team';
+
+async function refresh() {
+  try {
+    state = await (await fetch('/state')).json();
+  } catch (e) {
+    return;
+  }
+  const lot = state.lot;
+  const team = state.teams.find(t => t.name === myTeam);
+  document.getElementById('lot').textContent = !lot ? 'Waiting for the next player...'
+    : lot.status === 'Sold' ? lot.name + ' sold to ' + lot.team + ' for ' + lot.bid
+    : lot.name + ': \\u20b9 ' + lot.bid + ' (' + (lot.team || 'no bids') + ')'
+      + (team ? ' \\u00b7 you can bid up to ' + team.max_bid : '');
+}
+
+async function raise(increment) {
+  if (!state || !state.lot || !myTeam) return;
+  const body = {
+    team: myTeam,
+    token: myToken,
+    player_id: state.lot.id,
+    increment: increment,
+    bid_id: crypto.randomUUID ? crypto.randomUUID() : String(Date.now()) + Math.random(),
+    expected_bid: state.lot.bid,
+    expected_team: state.lot.team,
+  };
+  const ack = await (await fetch('/bid', {method: 'POST', body: JSON.stringify(body)})).json();
+  document.getElementById('ack').textContent = ack.error ? 'Error: ' + ack.error
+    : ack.accepted ? '#' + ack.seq + ' accepted at \\u20b9 ' + ack.current_bid : 'Rejected: ' + ack.reason;
+  refresh();
+}
+
+refresh();
+setInterval(refresh, 500);
+</script>
+</body>
+</html>
+"""
+
+
+def paddle_token(secret, team):
+    return hmac.new(secret.encode(), team.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def paddle_link(base_url, secret, team):
+    return f"{base_url}/?" + urlencode({'team': team, 'token': paddle_token(secret, team)})
+
+
+def _is_int(value):
+    # JSON true/false arrive as bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_bid(payload, secret):
+    # Returns (team, bid_id, place_bids tuple); raises ValueError for a bad
+    # request and PermissionError when the token is not the team's
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    team, bid_id = payload.get('team'), payload.get('bid_id')
+    player_id, increment = payload.get('player_id'), payload.get('increment')
+    if not isinstance(team, str) or not team:
+        raise ValueError("team is required")
+    token = payload.get('token')
+    # Compared as bytes: compare_digest raises TypeError on non-ASCII str
+    if not isinstance(token, str) or not hmac.compare_digest(token.encode(), paddle_token(secret, team).encode()):
+        raise PermissionError(f"Not a valid paddle token for {team}")
+    if not isinstance(bid_id, str) or not bid_id:
+        raise ValueError("bid_id is required")
+    if not _is_int(player_id) or not _is_int(increment):
+        raise ValueError("player_id and increment must be integers")
+    expected_bid = payload.get('expected_bid')
+    if expected_bid is not None and not _is_int(expected_bid):
+        raise ValueError("expected_bid must be an integer")
+    return team, bid_id, (player_id, team, increment, expected_bid, payload.get('expected_team'))
+
+
+def public_state(snap):
+    lot = snap.current_player
+    feas = analytics.feasibility(snap)
+    role = lot['role'] if lot is not None else None
+    return {
+        'version': snap.version,
+        'lot': None if lot is None else {
+            'id': lot['id'],
+            'name': lot['name'],
+            'status': lot['status'],
+            'bid': (lot['price'] if lot['status'] == 'Sold' else lot['current_bid']) or 0,
+            'team': lot['sold_to'] if lot['status'] == 'Sold' else lot['holding_team'],
+            'closes': snap.lot_deadline,
+        },
+        # What each team can bid for this lot and still complete its squad
+        'teams': [
+            {'name': t['name'], 'remaining': t['remaining'], 'max_bid': analytics.max_bid(feas, t['name'], role)}
+            for t in snap.standings
+        ],
+    }
+
+
+class BidDesk:
+    def __init__(self, secret):
+        self.secret = secret
+        self.queue = asyncio.Queue()
+        self.seq = 0
+        self.answers = OrderedDict()  # (team, bid_id) -> future holding the ack
+
+    def submit(self, team, bid_id, bid):
+        # The same raise sent twice (a retry after a dropped connection) gets
+        # the first answer instead of being bid again
+        key = (team, bid_id)
+        answer = self.answers.get(key)
+        if answer is None:
+            self.seq += 1
+            answer = self.answers[key] = asyncio.get_running_loop().create_future()
+            self.queue.put_nowait((self.seq, time.time(), bid_id, bid, answer))
+            while len(self.answers) > DEDUPE_KEPT and next(iter(self.answers.values())).done():
+                self.answers.popitem(last=False)
+        return answer
+
+    async def writer(self):
+        # The only task that bids, so raises land in the order they arrived
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < MAX_BATCH and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await asyncio.to_thread(db.place_bids, [bid for _, _, _, bid, _ in batch])
+            except Exception as e:
+                print(e)
+                results = [db.BidResult(False, str(e), None, None)] * len(batch)
+            applied = time.time()
+            for (seq, received, bid_id, bid, answer), result in zip(batch, results):
+                answer.set_result({
+                    'seq': seq,
+                    'bid_id': bid_id,
+                    'team': bid[1],
+                    'player_id': bid[0],
+                    'accepted': result.accepted,
+                    'reason': result.reason,
+                    'current_bid': result.current_bid,
+                    'holding_team': result.holding_team,
+                    'received': received,
+                    'queued_ms': round((applied - received) * 1000, 3),
+                })
+
+    async def handle(self, reader, writer):
+        try:
+            # Paddles keep their connection open between raises
+            while await self.handle_request(reader, writer):
+                pass
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, reader, writer):
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=REQUEST_TIMEOUT)
+        lines = head.decode('latin-1').split("\r\n")
+        parts = lines[0].split()
+        method = parts[0] if parts else 'GET'
+        path = parts[1].split('?', 1)[0] if len(parts) > 1 else '/'
+        headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+        keep_alive = headers.get('connection') != 'close'
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Without a length the body can't be framed, so drop the connection after
+            await self.respond(writer, '400 Bad Request', {'error': "Bad Content-Length"}, False)
+            return False
+        if length > MAX_BODY:
+            await self.respond(writer, '413 Payload Too Large', {'error': "Body too large"}, False)
+            return False
+        body = await reader.readexactly(length) if length else b""
+
+        if method == 'POST' and path == '/bid':
+            try:
+                team, bid_id, bid = parse_bid(json.loads(body or b"null"), self.secret)
+            except PermissionError as e:
+                await self.respond(writer, '403 Forbidden', {'error': str(e)}, keep_alive)
+                return keep_alive
+            except ValueError as e:
+                await self.respond(writer, '400 Bad Request', {'error': str(e)}, keep_alive)
+                return keep_alive
+            ack = await asyncio.shield(self.submit(team, bid_id, bid))
+            await self.respond(writer, '200 OK', ack, keep_alive)
+        elif method == 'GET' and path == '/state':
+            snap = await asyncio.to_thread(db.get_snapshot)
+            await self.respond(writer, '200 OK', public_state(snap), keep_alive)
+        elif method == 'GET' and path == '/':
+            await self.respond(writer, '200 OK', PADDLE_PAGE.encode(), keep_alive, 'text/html; charset=utf-8')
+        else:
+            await self.respond(writer, '404 Not Found', {'error': "Not Found"}, keep_alive)
+        return keep_alive
+
+    async def respond(self, writer, status, payload, keep_alive, content_type='application/json'):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload, separators=(',', ':')).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+
+async def serve(host, port, secret, ready=None):
+    desk = BidDesk(secret)
+    server = await asyncio.start_server(desk.handle, host, port, backlog=1024)
+    print(f"Bid paddles on http://{host}:{port}/")
+    if ready is not None:
+        ready(server)
+    async with server:
+        await asyncio.gather(server.serve_forever(), desk.writer())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Take bids from team paddles over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8503)
+    parser.add_argument('--db', default=db.DB_FILE, help="default auction database file")
+    parser.add_argument('--auction', default=db.DEFAULT_AUCTION, help="auction to take bids for")
+    parser.add_argument('--links', action='store_true', help="print each team's paddle link and exit")
+    args = parser.parse_args()
+
+    db.DB_FILE = args.db
+    # Paddles decide their next raise from /state, so keep it current
+    db.SNAPSHOT_MAX_AGE = 0
+    db.use_auction(args.auction)
+    secret = os.environ.get('AUCTION_PADDLE_SECRET')
+    if not secret:
+        if args.links:
+            parser.error("--links needs AUCTION_PADDLE_SECRET, or the links would not match the running service")
+        secret = secrets.token_hex(16)
+        print("AUCTION_PADDLE_SECRET is not set; these links only work until the service restarts")
+    # Listening on every interface: link to this machine by name
+    host = socket.gethostname() if args.host in ('0.0.0.0', '::') else args.host
+    for team in db.get_teams(['name']):
+        print(f"{team['name']}: {paddle_link(f'http://{host}:{args.port}', secret, team['name'])}")
+    if not args.links:
+        asyncio.run(serve(args.host, args.port, secret))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Pre-rendered pieces of the viewer page.
+
+Every viewer refresh used to rebuild the lot card HTML and a pandas
+DataFrame per table. The builders here are memoised on exactly the values
+they show (player id, status, bid and holding team for the lot card; the
+visible cells for tables), so a refresh where nothing moved reuses the
+fragments from the previous one. This module is imported rather than
+defined in auction_app.py so the caches outlive Streamlit's script reruns
+and are shared by every session in the process.
+"""
+import functools
+from html import escape
+
+RECENT_SALES_HEADERS = ('Name', 'Role', 'Sold To', 'Price')
+STANDINGS_HEADERS = ('Team', 'Budget', 'Spent', 'Remaining Purse', 'Max Bid')
+
+
+@functools.lru_cache(maxsize=256)
+def _lot_card(player_id, status, bid, holding_team, name, role, sold_to, price):
+    if status == 'Sold':
+        return f"""
+        <div style="background-color: #fff3e0; padding: 40px; border-radius: 15px; text-align: center; border: 3px solid #ff9800; margin-bottom: 20px;">
+            <h1 style="color: #e65100; font-size: 4em;">🎉 SOLD!</h1>
+            <h2 style="color: #333;">{escape(name)}</h2>
+            <hr>
+            <h3 style="color: #555;">Sold to <span style="color: #d84315; font-weight: bold;">{escape(str(sold_to))}</span></h3>
+            <h1 style="color: #2e7d32; font-size: 3.5em;">₹ {int(price or 0)}</h1>
+        </div>
+        """
+    return f"""
+        <div style="background-color: #e8f5e9; padding: 40px; border-radius: 15px; text-align: center; border: 3px solid #4CAF50; margin-bottom: 20px;">
+            <h1 style="color: #2e7d32; font-size: 3em;">{escape(name)}</h1>
+            <h3 style="color: #555;">{escape(role)}</h3>
+            <hr>
+            <h2 style="color: #d32f2f; font-size: 2.5em;">Current Bid: ₹ {bid}</h2>
+            <h3 style="color: #1976d2;">Holding: {escape(holding_team) if holding_team else 'Waiting for bids...'}</h3>
+        </div>
+        """
+
+
+def lot_card(player):
+    return _lot_card(
+        player['id'], player['status'], player['current_bid'] or 0, player['holding_team'],
+        player['name'], player['role'], player['sold_to'], player['price'],
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _html_table(headers, rows):
+    head = ''.join(f'<th style="text-align: left;">{escape(h)}</th>' for h in headers)
+    body = ''.join(
+        '<tr>' + ''.join(f'<td>{escape(str(cell))}</td>' for cell in row) + '</tr>' for row in rows
+    )
+    return f'<table style="width: 100%;"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def recent_sales_table(recent_sales):
+    return _html_table(RECENT_SALES_HEADERS, tuple(
+        (p['name'], p['role'], p['sold_to'], int(p['price'] or 0)) for p in recent_sales
+    ))
+
+
+def standings_table(standings, max_bids):
+    # max_bids lines up with standings (see analytics.max_bid)
+    return _html_table(STANDINGS_HEADERS, tuple(
+        (t['name'], t['budget'], t['spent'], t['remaining'], max_bid) for t, max_bid in zip(standings, max_bids)
+    ))
+
+
+def display_frame(rows, columns=None):
+    # rows are dicts, or tuples lined up with columns; pandas is only
+    # needed to lay out tables, so it is loaded on first use
+    import pandas as pd
+    df = pd.DataFrame(list(rows), columns=list(columns) if columns else None)
+    if 'price' in df:
+        df['price'] = df['price'].fillna(0).astype(int)
+    return df
+
+
+@functools.lru_cache(maxsize=128)
+def _frame(columns, rows):
+    return display_frame(rows, columns)
+
+
+def frame(rows, columns):
+    # The same DataFrame object is handed to every caller; treat it as read-only
+    columns = tuple(columns)
+    return _frame(columns, tuple(tuple(row[col] for col in columns) for row in rows))
@@ -0,0 +1,68 @@
+"""Lot timer scheduler.
+
+One background thread per process closes lots whose deadline has passed
+(see db.expire_lot). Every process hosting the auction may run one: the
+database decides which of them closes each lot, so it is closed once.
+
+    import scheduler
+    scheduler.start()
+"""
+import sys
+import threading
+
+import db
+
+INTERVAL = 0.2  # seconds between deadline checks
+
+_lock = threading.Lock()
+_thread = None
+_stop = threading.Event()
+_errors = {}  # auction_id -> the last error reported for it
+
+
+def run_once(auctions=None, now=None):
+    # Returns {auction_id: 'sold' | 'passed'} for the lots closed by this sweep
+    closed = {}
+    for auction_id in auctions or db.list_auctions():
+        try:
+            db.use_auction(auction_id)
+            outcome = db.expire_lot(now)
+        except Exception as e:
+            # A broken or locked auction fails every sweep; say so once
+            # per distinct error rather than several times a second
+            if _errors.get(auction_id) != str(e):
+                _errors[auction_id] = str(e)
+                print(f"Lot scheduler: auction {auction_id}: {e}", file=sys.stderr)
+            continue
+        if _errors.pop(auction_id, None) is not None:
+            print(f"Lot scheduler: auction {auction_id} recovered", file=sys.stderr)
+        if outcome:
+            closed[auction_id] = outcome
+    return closed
+
+
+def _run(auctions):
+    while not _stop.wait(INTERVAL):
+        run_once(auctions)
+
+
+def start(auctions=None):
+    # Returns the running sweep thread, starting it if none is alive.
+    # auctions=None sweeps every auction, including ones created later.
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return _thread
+        _stop.clear()
+        _thread = threading.Thread(target=_run, args=(auctions,), name="lot-scheduler", daemon=True)
+        _thread.start()
+        return _thread
+
+
+def stop():
+    global _thread
+    with _lock:
+        thread, _thread = _thread, None
+    _stop.set()
+    if thread is not None:
+        thread.join()
@@ -0,0 +1,306 @@
+"""Monte Carlo simulator for planning an auction.
+
+Runs many complete auctions headless against the real db.py rules, each
+in its own SQLite file (under /dev/shm when available, so it stays in
+memory). Teams, the player pool and the lot queue are set up with the
+usual import and queue functions. Every lot is then bid through
+db.place_bids() and closed with db.sell_player() or
+db.pass_current_player(), including the accelerated round for passed
+players. Auctions are spread over a process pool.
+
+Bidders are pluggable. A strategy decides the most a team will pay for
+the player on the floor and which raise from the increment ladder it makes
+next. The built-in ones are:
+
+    value       bids the smallest raise up to its own valuation
+    aggressive  jumps with the biggest raise that stays under its valuation
+    pacer       caps its valuation to what its purse allows per open slot
+
+Give one strategy, a comma-separated mix (dealt to teams in turn), or
+"module:Class" for your own Strategy subclass. Each lot's raises are worked
+out in Python, then sent to db.place_bids() in one transaction with the
+bid each raise expects. The database still accepts or rejects every raise.
+
+The report is JSON. It gives p5/p50/p95 across auctions for lots called,
+players sold and unsold, prices, teams out of money, incomplete squads,
+and auction length. Auction length uses --lot-seconds per lot plus
+--bid-seconds per accepted raise.
+
+    python simulator.py --auctions 10000 --players 300 --teams 10 --strategy value,pacer
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import db
+from benchmarks._common import nearest_rank
+
+INCREMENTS = (100, 200, 500)  # the raise buttons on the auction floor
+BASE_PRICES = (0, 100, 200, 500, 1000)
+ROLE_WEIGHTS = (0.35, 0.35, 0.2, 0.1)  # share of the pool per db.ROLES entry
+RAISES_PER_CALL = 64  # raises worked out ahead and sent in one place_bids() call
+
+
+class Strategy:
+    # One instance per team per auction. value() and step() can be overridden.
+    def __init__(self, team, rng, config):
+        self.team = team
+        self.rng = rng
+        self.config = config
+
+    def value(self, player, standing):
+        # Private valuation: the player's quality, priced off an even share
+        # of the purse per squad place, with this team's own noise
+        share = self.config['budget'] / self.config['squad']
+        return max(player['base_price'] or 0, share * player['quality'] * self.rng.lognormvariate(0, 0.3))
+
+    def limit(self, player, standing):
+        # The most the team pays for this player; 0 to stay out
+        if standing['max_players'] and standing['players'] >= standing['max_players']:
+            return 0
+        return int(min(self.value(player, standing), standing['remaining']))
+
+    def step(self, current_bid, limit, increments):
+        # The raise to make from current_bid, or None to stop
+        for increment in increments:
+            if current_bid + increment <= limit:
+                return increment
+        return None
+
+
+class Aggressive(Strategy):
+    def step(self, current_bid, limit, increments):
+        for increment in reversed(increments):
+            if current_bid + increment <= limit:
+                return increment
+        return None
+
+
+class Pacer(Strategy):
+    def limit(self, player, standing):
+        open_slots = (standing['max_players'] or self.config['squad']) - standing['players']
+        if open_slots <= 0:
+            return 0
+        # Keep the smallest raise back for every other place still to fill
+        reserve = (open_slots - 1) * min(self.config['increments'])
+        pace = 2 * standing['remaining'] / open_slots
+        return int(max(0, min(self.value(player, standing), pace, standing['remaining'] - reserve)))
+
+
+STRATEGIES = {'value': Strategy, 'aggressive': Aggressive, 'pacer': Pacer}
+
+
+def load_strategy(name):
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module, _, attr = name.partition(':')
+    if not attr:
+        raise ValueError(f"Unknown strategy {name!r}; use one of {sorted(STRATEGIES)} or module:Class")
+    return getattr(importlib.import_module(module), attr)
+
+
+def make_pool(rng, config):
+    teams = [f"Team {t + 1}" for t in range(config['teams'])]
+    players = []
+    for i in range(config['players']):
+        base_price = rng.choice(BASE_PRICES)
+        players.append({
+            'name': f"Player {i + 1}",
+            'role': rng.choices(db.ROLES, ROLE_WEIGHTS)[0],
+            'base_price': base_price,
+            'category': 'Marquee' if base_price >= 1000 else 'Capped' if base_price else 'Uncapped',
+            # Shared by every team, so good players draw several bidders
+            'quality': rng.lognormvariate(0, 0.8),
+        })
+    return teams, players
+
+
+def run_lot(player, limits, strategies, rng, increments):
+    # Returns (accepted raises, rejected raises, winning bid, holding team)
+    bid, holder = 0, None
+    accepted = rejected = 0
+    while True:
+        # Work the lot out as if every raise lands, paddles arriving in random order
+        raises, expected_bid, expected_team = [], bid, holder
+        while len(raises) < RAISES_PER_CALL:
+            bidders = [t for t, limit in limits.items() if t != expected_team and limit >= expected_bid + increments[0]]
+            if not bidders:
+                break
+            team = rng.choice(bidders)
+            increment = strategies[team].step(expected_bid, limits[team], increments)
+            if increment is None:
+                limits[team] = 0
+                continue
+            raises.append((player['id'], team, increment, expected_bid, expected_team))
+            expected_bid, expected_team = expected_bid + increment, team
+        if not raises:
+            break
+        results = db.place_bids(raises)
+        for (_, team, _, _, _), result in zip(raises, results):
+            if not result.accepted:
+                # Everything after the first refusal expected a bid that never
+                # happened; the refused team sits the rest of the lot out
+                rejected += 1
+                limits[team] = 0
+                break
+            accepted += 1
+            bid, holder = result.current_bid, result.holding_team
+    return accepted, rejected, bid, holder
+
+
+def simulate(seed, config):
+    rng = random.Random(seed)
+    teams, pool = make_pool(rng, config)
+    for path in (db.DB_FILE, db.DB_FILE + '-wal', db.DB_FILE + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    db.close_pool()
+    db.init_db()
+    db.import_teams("name,budget,max_players\n" + ''.join(
+        f"{t},{config['budget']},{config['squad']}\n" for t in teams
+    ))
+    db.import_players("name,role,base_price,category\n" + ''.join(
+        f"{p['name']},{p['role']},{p['base_price']},{p['category']}\n" for p in pool
+    ))
+    quality = {p['name']: p['quality'] for p in pool}
+    db.build_lot_queue(seed=seed or 1, set_order=['Marquee', 'Capped', 'Uncapped'])
+
+    kinds = config['strategy']
+    strategies = {t: load_strategy(kinds[i % len(kinds)])(t, rng, config) for i, t in enumerate(teams)}
+    increments = tuple(sorted(config['increments']))
+
+    started = time.perf_counter()
+    prices, lots, raises, refused, seconds = [], 0, 0, 0, 0.0
+    standings = {s['name']: s for s in db.get_squad_summary()}
+    while True:
+        player = db.next_lot()
+        if player is None:
+            break
+        lots += 1
+        player['quality'] = quality[player['name']]
+        limits = {t: strategies[t].limit(player, standings[t]) for t in teams}
+        accepted, rejected, bid, holder = run_lot(player, limits, strategies, rng, increments)
+        raises += accepted
+        refused += rejected
+        seconds += config['lot_seconds'] + accepted * config['bid_seconds']
+        if holder is not None and db.sell_player(player['id'], holder, bid):
+            prices.append(bid)
+            standings = {s['name']: s for s in db.get_squad_summary()}
+        else:
+            db.pass_current_player()
+
+    min_raise = increments[0]
+    result = {
+        'lots': lots,
+        'sold': len(prices),
+        'unsold': len(pool) - len(prices),
+        'raises': raises,
+        'refused': refused,
+        'mean_price': sum(prices) / len(prices) if prices else 0,
+        'top_price': max(prices, default=0),
+        'spent_share': sum(s['spent'] for s in standings.values()) / (config['budget'] * len(teams)),
+        'purse_exhausted': sum(1 for s in standings.values() if s['remaining'] < min_raise),
+        'incomplete_squads': sum(1 for s in standings.values() if s['players'] < config['squad']),
+        'duration_minutes': seconds / 60,
+        'wall_seconds': time.perf_counter() - started,
+        'prices': prices,
+    }
+    db.close_pool()
+    return result
+
+
+def _init_worker(workdir):
+    # One database file per worker process, recreated for every auction
+    db.DB_FILE = os.path.join(workdir, f"sim-{os.getpid()}.db")
+
+
+def _simulate_batch(seeds, config):
+    return [simulate(seed, config) for seed in seeds]
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return None
+
+    def at(pct):
+        return round(nearest_rank(values, pct), 2)
+
+    return {'p5': at(5), 'p50': at(50), 'p95': at(95), 'min': round(values[0], 2), 'max': round(values[-1], 2)}
+
+
+def run(config, workers, batch=10):
+    seeds = [config['seed'] + n for n in range(config['auctions'])]
+    batches = [seeds[i:i + batch] for i in range(0, len(seeds), batch)]
+    metrics = {}
+    all_prices = array('q')
+    started = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix='auction-sim-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(workdir,)) as pool:
+            done = 0
+            for results in pool.map(_simulate_batch, batches, [config] * len(batches)):
+                for result in results:
+                    all_prices.extend(result.pop('prices'))
+                    for name, value in result.items():
+                        metrics.setdefault(name, []).append(value)
+                done += len(results)
+                print(f"\r{done}/{config['auctions']} auctions", end='', file=sys.stderr, flush=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(file=sys.stderr)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'config': config,
+        'workers': workers,
+        'elapsed_seconds': round(elapsed, 1),
+        'auctions_per_second': round(config['auctions'] / elapsed, 1),
+        'price': percentiles(all_prices),
+        **{name: percentiles(values) for name, values in metrics.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many auctions to test budgets, pool size and increments.")
+    parser.add_argument('--auctions', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=300)
+    parser.add_argument('--teams', type=int, default=10)
+    parser.add_argument('--budget', type=int, default=10000, help="purse per team")
+    parser.add_argument('--squad', type=int, default=25, help="max players per team")
+    parser.add_argument('--increments', default=','.join(map(str, INCREMENTS)), help="raise ladder, e.g. 100,200,500")
+    parser.add_argument('--strategy', default='value', help="strategy, comma-separated mix, or module:Class")
+    parser.add_argument('--lot-seconds', type=float, default=20, help="time to call a lot, before any bids")
+    parser.add_argument('--bid-seconds', type=float, default=3, help="time per accepted raise")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    config = {
+        'auctions': args.auctions, 'players': args.players, 'teams': args.teams, 'budget': args.budget,
+        'squad': args.squad, 'increments': [int(i) for i in args.increments.split(',')],
+        'strategy': args.strategy.split(','), 'lot_seconds': args.lot_seconds, 'bid_seconds': args.bid_seconds,
+        'seed': args.seed,
+    }
+    for kind in config['strategy']:
+        load_strategy(kind)  # fail before starting the pool
+
+    report = run(config, args.workers)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
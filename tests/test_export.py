@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db
+import scheduler
+
+
+@pytest.fixture
+def auctions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(db, 'DB_FILE', str(tmp_path / 'auction.db'))
+    monkeypatch.setattr(db, 'AUCTIONS_DIR', str(tmp_path / 'auctions'))
+    for auction in ('season-1', 'season-2'):
+        db.use_auction(auction)
+        db.add_team("Chargers", 10000)
+        db.add_player("Virat Kohli", 'Batsman')
+    yield ['season-1', 'season-2']
+    db.close_pool()
+
+
+@pytest.mark.parametrize('table', list(db.EXPORT_TABLES))
+@pytest.mark.parametrize('fmt', db.available_export_formats())
+def test_export_bytes(auctions, table, fmt):
+    # st.download_button takes bytes as they are
+    data = db.export_bytes(table, fmt, auctions)
+    assert isinstance(data, bytes)
+    if fmt == 'parquet':
+        assert data[:4] == b'PAR1'
+    elif table in ('players', 'teams'):
+        if fmt == 'jsonl':
+            rows = [json.loads(line) for line in data.decode().splitlines()]
+        else:
+            rows = data.decode().splitlines()[1:]
+        assert len(rows) == 2
+        assert 'season-1' in data.decode() and 'season-2' in data.decode()
+
+
+def test_admin_page_offers_the_export(auctions):
+    app_test = pytest.importorskip("streamlit.testing.v1")
+    at = app_test.AppTest.from_file(os.path.join(ROOT, 'auction_app.py'), default_timeout=30)
+    at.secrets['DB_USERNAME'] = "admin"
+    at.secrets['DB_PASSWORD'] = "admin"
+    at.session_state['authenticated'] = True
+    try:
+        at.run()
+        at.sidebar.radio[0].set_value("Admin").run()
+    finally:
+        # The app starts the lot scheduler; it must not outlive tmp_path
+        scheduler.stop()
+    assert not at.exception
+    buttons = [b for b in at.get('download_button') if b.label == "Download Export"]
+    assert len(buttons) == 1
+    assert not buttons[0].proto.disabled